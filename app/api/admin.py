@@ -1,14 +1,29 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from app.core.config import ADMIN_ID, ADMIN_PASSWORD, ADMIN_EMAIL, ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM
+from typing import List, Literal, Optional
+from app.core.config import ADMIN_ID, ADMIN_PASSWORD, ADMIN_EMAIL, SECRET_KEY, ALGORITHM
+from app.core.security import create_access_token
+from app.core.ttl_store import ttl_store
 from app.db.database import (
-    pending_students, approved_students, rejected_students,
+    db, pending_students, approved_students, rejected_students,
     pending_teachers, approved_teachers, rejected_teachers, notifications
 )
-from app.core.email_utils import send_email
+from app.core.email_outbox import enqueue_email, outbox_stats, requeue_dead
+from app.core.email_utils import smtp_pool
+from app.core.email_templates import (
+    student_approved_email, student_rejected_email, teacher_approved_email, teacher_rejected_email
+)
+from app.db.transactions import run_in_transaction
+from app.db.users import decide_one, decide_many, merge_user_collections
+from app.utils.identity_registry import backfill_identities, set_status
+from app.utils.notification_inbox import rebuild_inbox
+from app.core.slow_queries import SLOW_QUERY_COLLECTION
+from app.utils.photo_store import migrate_inline_photos
+from app.utils.pagination import ListParams, list_documents
 from datetime import datetime, timedelta
 from jose import jwt
 import random
+import time
 from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 import os
@@ -16,9 +31,11 @@ import os
 router = APIRouter()
 
 
-# TEMPORARY: in-memory; use Redis/DB in production
-admin_otp_store = {}
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# Shared across workers, so verify-otp can land on a different process than request-otp
+admin_otp_store = ttl_store("admin_otp")
+ADMIN_OTP_MINUTES = 5
+# Kept past expiry for a while so verify can still answer "OTP expired"
+ADMIN_OTP_GRACE_MINUTES = 10
 
 class AdminLogin(BaseModel):
     user_id: str
@@ -34,8 +51,11 @@ def admin_request_otp(data: AdminLogin):
         raise HTTPException(status_code=401, detail="Invalid admin credentials")
     
     otp = str(random.randint(100000, 999999))
-    expires = datetime.utcnow() + timedelta(minutes=5)
-    admin_otp_store[data.user_id] = {"otp": otp, "expires": expires}
+    admin_otp_store.set(
+        data.user_id,
+        {"otp": otp, "expires": time.time() + ADMIN_OTP_MINUTES * 60},
+        ttl_seconds=(ADMIN_OTP_MINUTES + ADMIN_OTP_GRACE_MINUTES) * 60,
+    )
 
     subject = "Your Admin Login OTP"
     message = f"""
@@ -47,30 +67,26 @@ def admin_request_otp(data: AdminLogin):
     Geeky_coders
     """
 
-    send_email(ADMIN_EMAIL, subject, message)
+    enqueue_email(ADMIN_EMAIL, subject, message)
     return {"message": "OTP sent to admin email"}
 
 
-def create_access_token(data: dict, expires_delta: timedelta = None):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-
 @router.post("/admin/verify-otp")
 def admin_verify_otp(data: OtpVerify):
     record = admin_otp_store.get(data.user_id)
     if not record:
         raise HTTPException(status_code=400, detail="No OTP requested")
-    if datetime.utcnow() > record["expires"]:
+    if time.time() > record["expires"]:
         raise HTTPException(status_code=400, detail="OTP expired")
     if record["otp"] != data.otp:
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
-    # OTP valid → delete it
-    del admin_otp_store[data.user_id]
+    # OTP valid → consume it; pop is atomic, so a replayed request racing this one loses
+    consumed = admin_otp_store.pop(data.user_id)
+    if not consumed or consumed["otp"] != data.otp:
+        raise HTTPException(status_code=400, detail="No OTP requested")
 
-    access_token = create_access_token({"sub": data.user_id})
+    access_token = create_access_token({"sub": data.user_id, "role": "admin"})
     return {"access_token": access_token, "token_type": "bearer"}
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="admin/verify-otp")
@@ -78,7 +94,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="admin/verify-otp")
 def verify_admin_token(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        if payload.get("sub").lower() != ADMIN_ID.lower():
+        # Student/teacher session tokens share SECRET_KEY; only tokens issued as admin pass
+        if payload.get("role") != "admin" or payload.get("sub").lower() != ADMIN_ID.lower():
             raise HTTPException(status_code=403, detail="Invalid admin token")
         return payload  # This was missing
     except Exception:
@@ -91,166 +108,214 @@ def admin_login(data: AdminLogin):
         raise HTTPException(status_code=401, detail="Invalid admin credentials")
     return {"message": "Admin login successful"}
 
+def decide_user(role: str, query: dict, status: str):
+    """Approve/reject one pending user and keep the identity registry in step."""
+    id_field = "roll_no" if role == "student" else "employee_id"
+
+    def decide(session):
+        doc = decide_one(role, query, status, session=session)
+        if doc:
+            set_status(role, [doc[id_field]], status, session=session)
+        return doc
+
+    return run_in_transaction(decide)
+
+
 @router.post("/admin/approve/student/{roll_no}")
 
 def approve_student(roll_no: str, admin_payload: dict = Depends(verify_admin_token)):
-    # student = pending_students.find_one({"roll_no": roll_no})
-    student = pending_students.find_one({"roll_no": {"$regex": f"^{roll_no}$", "$options": "i"}})
-
+    student = decide_user("student", {"roll_no": {"$regex": f"^{roll_no}$", "$options": "i"}}, "approved")
 
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    # Move from pending to approved
-    pending_students.delete_one({"roll_no": roll_no})
-    approved_students.insert_one(student)
-
     # Email details
     name = student["full_name"]
     email = student["email"]
-    subject = "Your Student Account Has Been Approved!"
-
-    message = f"""
-    Dear {name},
-
-    We are pleased to inform you that your student account has been successfully approved on the College Attendance Management System.
-
-    You can now log in to your account and start using the following features:
-    • Mark your attendance using the secure OTP system  
-    • View and track your attendance history  
-    • Stay informed about schedules, notices, and updates  
+    subject, message = student_approved_email(name)
 
-    If you have any questions or need assistance, please contact the system administrator or your department office.
-
-    We warmly welcome you to the platform and wish you great success in your academic journey.
-
-    Best regards,  
-    College Attendance Management Team
-    """
-
-    send_email(email, subject, message)
+    enqueue_email(email, subject, message)
     return {"message": "Student approved"}
 
 
 @router.post("/admin/reject/student/{roll_no}")
 def reject_student(roll_no: str, admin_payload: dict = Depends(verify_admin_token)):
-    # student = pending_students.find_one({"roll_no": roll_no})
-    student = pending_students.find_one({"roll_no": {"$regex": f"^{roll_no}$", "$options": "i"}})
+    student = decide_user("student", {"roll_no": {"$regex": f"^{roll_no}$", "$options": "i"}}, "rejected")
 
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-    pending_students.delete_one({"roll_no": roll_no})
-    rejected_students.insert_one(student)
     name = student["full_name"]
     email = student["email"]
-    subject = "Update on Your Student Account Registration"
-    message = f"""
-    Dear {name},
-
-    Thank you for registering on our College Attendance Management System.
-    We regret to inform you that your registration could not be approved at this time due to certain issues or discrepancies identified during the verification process.
-    If you believe this is an error or if you require further clarification, please contact the college administration or visit the department office responsible for student registration.
+    subject, message = student_rejected_email(name)
 
-    We appreciate your understanding and cooperation.
-
-    Best regards,  
-    College Attendance Team
-    """
-
-    send_email(email, subject, message)
+    enqueue_email(email, subject, message)
     return {"message": "Student rejected"}
 
 # same for teacher
 @router.post("/admin/approve/teacher/{employee_id}")
 def approve_teacher(employee_id: str, admin_payload: dict = Depends(verify_admin_token)):
     emp_id = employee_id.upper()
-    # teacher = pending_teachers.find_one({"employee_id": emp_id})
-    teacher = pending_teachers.find_one({"employee_id": {"$regex": f"^{emp_id}$", "$options": "i"}})
+    teacher = decide_user("teacher", {"employee_id": {"$regex": f"^{emp_id}$", "$options": "i"}}, "approved")
 
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
-    pending_teachers.delete_one({"employee_id": emp_id})
-    approved_teachers.insert_one(teacher)
     name = teacher["full_name"]
     email = teacher["email"]
-    subject = "Your Teacher Account Has Been Approved!"
-    message = f"""
-    Dear {name},
-
-    We are pleased to inform you that your teacher account has been successfully approved on the College Attendance Management System.
-
-    You may now log in to your account and access the following features:
-    - Generate and manage OTP-based attendance  
-    - View your attendance history  
-    - Stay informed about class activities and updates
+    subject, message = teacher_approved_email(name)
 
-    If you have any questions or require assistance, please do not hesitate to contact the system administrator or support team.
-
-    Welcome aboard, and thank you for being a part of our academic community.
-
-    Best regards,  
-    College Attendance Team
-    """
-
-    send_email(email, subject, message)
+    enqueue_email(email, subject, message)
     return {"message": "Teacher approved"}
 
 @router.post("/admin/reject/teacher/{employee_id}")
 def reject_teacher(employee_id: str, admin_payload: dict = Depends(verify_admin_token)):
     emp_id = employee_id.upper()
-    # teacher = pending_teachers.find_one({"employee_id": emp_id})
-    teacher = pending_teachers.find_one({"employee_id": {"$regex": f"^{emp_id}$", "$options": "i"}})
+    teacher = decide_user("teacher", {"employee_id": {"$regex": f"^{emp_id}$", "$options": "i"}}, "rejected")
 
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
-    pending_teachers.delete_one({"employee_id": emp_id})
-    rejected_teachers.insert_one(teacher)
     name = teacher["full_name"]
     email = teacher["email"]
-    subject = "Update on Your Teacher Account Registration"
-    message = f"""
-    Dear {name},
-
-    Thank you for registering on our College Attendance Management System.
-
-    We regret to inform you that your registration could not be approved at this time due to certain issues or discrepancies identified during the verification process.
+    subject, message = teacher_rejected_email(name)
 
-    If you believe this is an error or if you require further clarification, please contact the college administration or visit the department office responsible for teacher registration.
-
-    We appreciate your understanding and cooperation.
-
-    Best regards,  
-    College Attendance Team
-
-    """
-
-    send_email(email, subject, message)
+    enqueue_email(email, subject, message)
     return {"message": "Teacher rejected"}
 
-# lists
+# bulk decisions
+class BulkDecision(BaseModel):
+    ids: List[str] = []
+    # students only: decide a whole class instead of listing roll numbers
+    branch: Optional[str] = None
+    semester: Optional[str] = None
+    section: Optional[str] = None
+
+
+BULK_DECISIONS = {
+    ("approve", "students"): ("approved", "roll_no", student_approved_email),
+    ("reject", "students"): ("rejected", "roll_no", student_rejected_email),
+    ("approve", "teachers"): ("approved", "employee_id", teacher_approved_email),
+    ("reject", "teachers"): ("rejected", "employee_id", teacher_rejected_email),
+}
+
+
+def bulk_decision_query(role: str, id_field: str, data: BulkDecision) -> dict:
+    if data.ids:
+        ids = [i.strip().upper() if role == "teachers" else i.strip() for i in data.ids if i.strip()]
+        return {id_field: {"$in": ids}}
+
+    class_filter = {k: v.strip() for k, v in (("branch", data.branch), ("section", data.section)) if v}
+    if data.semester:
+        semester = data.semester.strip()
+        class_filter["semester"] = {"$in": [int(semester), semester]} if semester.isdigit() else semester
+    if role != "students" or not class_filter:
+        raise HTTPException(status_code=400, detail="Provide ids, or a branch/semester/section filter for students")
+    return class_filter
+
+
+@router.post("/admin/bulk/{action}/{role}")
+def bulk_decide(
+    action: Literal["approve", "reject"],
+    role: Literal["students", "teachers"],
+    data: BulkDecision,
+    admin_payload: dict = Depends(verify_admin_token),
+):
+    status, id_field, template = BULK_DECISIONS[(action, role)]
+    query = bulk_decision_query(role, id_field, data)
+
+    # One update_many (unified store) or find + insert_many + delete_many (split store),
+    # atomically where transactions are available
+    def move(session):
+        docs = decide_many(role[:-1], query, status, session=session)
+        set_status(role[:-1], [d[id_field] for d in docs], status, session=session)
+        return docs
+
+    moved = run_in_transaction(move)
+
+    # Queued in the outbox; delivery happens in the background workers
+    for d in moved:
+        if d.get("email"):
+            enqueue_email(d["email"], *template(d.get("full_name", "")))
+
+    results = {str(d.get(id_field)): status for d in moved}
+    if data.ids:
+        for i in query[id_field]["$in"]:
+            results.setdefault(i, "not_found")
+    return {"processed": len(moved), "results": results}
+
+
+# lists (keyset-paginated; ?format=ndjson streams the whole collection)
 @router.get("/admin/list/pending/students")
-def list_pending_students():
-    return list(pending_students.find({}, {"_id": 0}))
+def list_pending_students(params: ListParams = Depends()):
+    return list_documents(pending_students, {}, params)
 
 @router.get("/admin/list/pending/teachers")
-def list_pending_teachers():
-    return list(pending_teachers.find({}, {"_id": 0}))
+def list_pending_teachers(params: ListParams = Depends()):
+    return list_documents(pending_teachers, {}, params)
 
 @router.get("/admin/list/approved/students")
-def list_approved_students():
-    return list(approved_students.find({}, {"_id": 0}))
+def list_approved_students(params: ListParams = Depends()):
+    return list_documents(approved_students, {}, params)
 
 @router.get("/admin/list/approved/teachers")
-def list_approved_teachers():
-    return list(approved_teachers.find({}, {"_id": 0}))
+def list_approved_teachers(params: ListParams = Depends()):
+    return list_documents(approved_teachers, {}, params)
 
 @router.get("/admin/list/rejected/students")
-def list_rejected_students():
-    return list(rejected_students.find({}, {"_id": 0}))
+def list_rejected_students(params: ListParams = Depends()):
+    return list_documents(rejected_students, {}, params)
 
 @router.get("/admin/list/rejected/teachers")
-def list_rejected_teachers():
-    return list(rejected_teachers.find({}, {"_id": 0}))
+def list_rejected_teachers(params: ListParams = Depends()):
+    return list_documents(rejected_teachers, {}, params)
+
+
+# maintenance
+@router.post("/admin/maintenance/rebuild-inbox")
+def rebuild_notification_inbox(admin_payload: dict = Depends(verify_admin_token)):
+    return {"message": "Notification inbox rebuilt", "entries": rebuild_inbox()}
+
+
+@router.post("/admin/maintenance/migrate-photos")
+def migrate_photos(admin_payload: dict = Depends(verify_admin_token)):
+    return {
+        "students": migrate_inline_photos(approved_students, "student", "roll_no"),
+        "teachers": migrate_inline_photos(approved_teachers, "teacher", "employee_id"),
+    }
+
+
+@router.post("/admin/maintenance/merge-user-collections")
+def merge_users(admin_payload: dict = Depends(verify_admin_token)):
+    """Run before switching USER_STORE to "unified"."""
+    return {"message": "User collections merged", "merged": merge_user_collections()}
+
+
+@router.post("/admin/maintenance/backfill-identities")
+def backfill_identity_registry(admin_payload: dict = Depends(verify_admin_token)):
+    return backfill_identities()
+
+
+@router.get("/admin/maintenance/slow-queries")
+def slow_queries(
+    flag: Optional[str] = None,
+    limit: int = 50,
+    admin_payload: dict = Depends(verify_admin_token),
+):
+    """Most recent slow commands first; ?flag=COLLSCAN (or REGEX_UNANCHORED, ...) narrows it down."""
+    query = {"flags": flag} if flag else {}
+    cursor = db[SLOW_QUERY_COLLECTION].find(query, {"_id": 0}).sort("$natural", -1).limit(min(limit, 500))
+    return list(cursor)
+
+
+# email outbox
+@router.get("/admin/email/outbox")
+def email_outbox_status(admin_payload: dict = Depends(verify_admin_token)):
+    return outbox_stats()
+
 
+@router.get("/admin/email/delivery-stats")
+def email_delivery_stats(admin_payload: dict = Depends(verify_admin_token)):
+    return smtp_pool.stats()
 
 
+@router.post("/admin/email/outbox/retry-dead")
+def email_outbox_retry_dead(admin_payload: dict = Depends(verify_admin_token)):
+    return {"requeued": requeue_dead()}
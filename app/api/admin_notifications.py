@@ -1,17 +1,16 @@
 # app/api/admin_notifications.py
 import os
-import shutil
 from fastapi import APIRouter, UploadFile, Form, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
-from pymongo import MongoClient
 from bson import ObjectId
 from datetime import datetime
 from typing import Optional, List
-
-# MongoDB Connection
-client = MongoClient(os.getenv("MONGO_URI", "mongodb+srv://<your-uri>"))
-db = client["uietattendance"]
-notifications_col = db["adminnotifications"]
+from app.utils.attachment_store import store_attachment, release_attachment
+from app.utils import notification_inbox
+from app.api.student_notification import safe_datetime
+from app.db.database import admin_notifications as notifications_col
+from app.core.responses import FastJSONResponse
 
 # Router
 router = APIRouter(prefix="/admin", tags=["Admin Notifications"])
@@ -53,12 +52,11 @@ async def send_notification(
     try:
         # File Handling
         file_url = None
+        attachment_digest = None
         if file:
-            filename = f"{datetime.utcnow().timestamp()}_{file.filename}"
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
-            with open(filepath, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            file_url = f"/files/notifications/{filename}"
+            stored = await run_in_threadpool(store_attachment, file.file, file.filename, file.content_type)
+            file_url = stored["url"]
+            attachment_digest = stored["digest"]
 
         # Parse roll numbers
         roll_list = []
@@ -77,9 +75,11 @@ async def send_notification(
             "roll_numbers": roll_list,
             "expiry_time": expiry_time,
             "file_url": file_url,
+            "attachment_digest": attachment_digest,
             "created_at": datetime.utcnow(),
         }
         result = notifications_col.insert_one(notif)
+        notification_inbox.fan_out_admin_notification(notif, safe_datetime(expiry_time))
 
         return {"status": "success", "id": str(result.inserted_id)}
     except Exception as e:
@@ -89,7 +89,7 @@ async def send_notification(
 @router.get("/notifications/{admin_id}")
 async def get_notifications(admin_id: str):
     notifs = notifications_col.find({"admin_id": admin_id.upper()}).sort("created_at", -1)
-    return [notif_serializer(n) for n in notifs]
+    return FastJSONResponse([notif_serializer(n) for n in notifs])
 
 
 @router.post("/notifications/delete")
@@ -103,14 +103,17 @@ async def delete_notification(
     if notif["admin_id"] != admin_id.upper():
         raise HTTPException(status_code=403, detail="Not authorized to delete this notification")
 
-    # Delete file if exists
-    if notif.get("file_url"):
+    # Release attachment, or delete a legacy file if exists
+    if notif.get("attachment_digest"):
+        release_attachment(notif["attachment_digest"])
+    elif notif.get("file_url"):
         filename = notif["file_url"].split("/")[-1]
         filepath = os.path.join(UPLOAD_FOLDER, filename)
         if os.path.exists(filepath):
             os.remove(filepath)
 
     notifications_col.delete_one({"_id": ObjectId(notification_id)})
+    notification_inbox.remove(ObjectId(notification_id))
     return {"status": "success", "message": "Notification deleted"}
 
 
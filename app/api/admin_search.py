@@ -0,0 +1,90 @@
+# app/api/admin_search.py
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pymongo import UpdateOne
+from app.api.admin import verify_admin_token
+from app.db.database import (
+    pending_students, approved_students, rejected_students,
+    pending_teachers, approved_teachers, rejected_teachers
+)
+from app.utils.pagination import HIDDEN_FIELDS, serialize_document
+from app.utils.search_keys import name_keys, normalize_name, prefix_regex
+
+router = APIRouter(tags=["Admin Search"])
+
+COLLECTIONS = {
+    "students": {"pending": pending_students, "approved": approved_students, "rejected": rejected_students},
+    "teachers": {"pending": pending_teachers, "approved": approved_teachers, "rejected": rejected_teachers},
+}
+ID_FIELDS = {"students": "roll_no", "teachers": "employee_id"}
+
+
+def build_search_query(role: str, q: Optional[str], branch: Optional[str], semester: Optional[str], section: Optional[str]) -> dict:
+    query = {}
+    if branch:
+        query["branch"] = branch.strip()
+    if semester:
+        semester = semester.strip()
+        # Stored as int by the register form, but as text by some bulk sheets
+        query["semester"] = {"$in": [int(semester), semester]} if semester.isdigit() else semester
+    if section:
+        query["section"] = section.strip()
+
+    if q and q.strip():
+        id_term = q.strip().upper() if role == "teachers" else q.strip()
+        query["$or"] = [
+            {"name_keys": prefix_regex(normalize_name(q))},
+            {ID_FIELDS[role]: prefix_regex(id_term)},
+        ]
+    return query
+
+
+@router.get("/admin/search/{role}")
+def search_users(
+    role: Literal["students", "teachers"],
+    q: Optional[str] = Query(None, description="Prefix of name, roll_no or employee_id"),
+    status: Literal["pending", "approved", "rejected", "all"] = "approved",
+    branch: Optional[str] = None,
+    semester: Optional[str] = None,
+    section: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    admin_payload: dict = Depends(verify_admin_token),
+):
+    query = build_search_query(role, q, branch, semester, section)
+    projection = {name: 0 for name in HIDDEN_FIELDS}
+    statuses = ["pending", "approved", "rejected"] if status == "all" else [status]
+
+    results = []
+    for s in statuses:
+        remaining = limit - len(results)
+        if remaining <= 0:
+            break
+        for doc in COLLECTIONS[role][s].find(query, projection).limit(remaining):
+            doc = serialize_document(doc)
+            doc["status"] = s
+            results.append(doc)
+
+    return {"count": len(results), "results": results}
+
+
+def backfill_name_keys() -> dict:
+    """Add name_keys to documents written before search indexing existed."""
+    counts = {}
+    for role, by_status in COLLECTIONS.items():
+        for status, collection in by_status.items():
+            ops = []
+            for doc in collection.find({"name_keys": {"$exists": False}}, {"full_name": 1, "name": 1}):
+                ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"name_keys": name_keys(doc.get("full_name") or doc.get("name"))}}))
+                if len(ops) == 1000:
+                    collection.bulk_write(ops, ordered=False)
+                    ops = []
+            if ops:
+                collection.bulk_write(ops, ordered=False)
+            counts[f"{status}_{role}"] = collection.count_documents({"name_keys": {"$exists": True}})
+    return counts
+
+
+@router.post("/admin/maintenance/backfill-search-keys")
+def backfill_search_keys(admin_payload: dict = Depends(verify_admin_token)):
+    return {"message": "Search keys backfilled", "indexed": backfill_name_keys()}
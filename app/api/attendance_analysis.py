@@ -1,9 +1,11 @@
 # # app/api/attendance_analysis.py
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Optional
 from datetime import datetime
 from app.db.database import approved_students,otps,attendance
-from app.core.config import SUBJECTS
+from app.core.subject_catalog import subject_catalog
+from app.core.security import student_session, session_user
 from bson import ObjectId
 from datetime import datetime
 
@@ -16,12 +18,13 @@ def student_attendance_analysis(
     roll_no: str,
     month: int,
     year: int,
-    subject: str = Query(None, description="Optional subject filter")
+    subject: str = Query(None, description="Optional subject filter"),
+    session: Optional[dict] = Depends(student_session),
 ):
     roll_no = str(roll_no)
 
     # 1. Get student info
-    student = approved_students.find_one({"roll_no": roll_no})
+    student = session_user(session, roll_no, lambda: approved_students.find_one({"roll_no": roll_no}, {"branch": 1, "semester": 1}))
     if not student:
         raise HTTPException(status_code=404, detail=f"Student with roll_no {roll_no} not found")
 
@@ -29,17 +32,18 @@ def student_attendance_analysis(
     branch = student.get("branch")
     semester = str(student.get("semester"))
 
-    if program not in SUBJECTS or branch not in SUBJECTS[program] or semester not in SUBJECTS[program][branch]:
+    # curriculum subjects, lowercased once in the catalog (lowercase is what the DB queries use)
+    curriculum = subject_catalog.lower_subjects(program, branch, semester)
+    if curriculum is None:
         raise HTTPException(status_code=400, detail="Subjects not defined for this branch/semester")
-
-    # curriculum subjects (normalize to lowercase for DB queries)
-    subjects = [s.lower() for s in SUBJECTS[program][branch][semester]]
+    subjects = list(curriculum)
 
     # if specific subject filter is provided
     if subject:
-        if subject.lower() not in subjects:
+        if subject.lower() not in subject_catalog.lower_subject_set(program, branch, semester):
             raise HTTPException(status_code=400, detail=f"Subject '{subject}' not in student curriculum")
         subjects = [subject.lower()]
+    subject_set = frozenset(subjects)
 
     start_date = datetime(year, month, 1)
     end_date = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
@@ -54,7 +58,7 @@ def student_attendance_analysis(
     }
     for otp_doc in otps.find(otp_query):
         sub = otp_doc["subject"].lower()
-        if sub in subjects:
+        if sub in subject_set:
             result[sub.upper()]["total"] += 1
 
     # Count attended classes (case-insensitive match)
@@ -65,18 +69,12 @@ def student_attendance_analysis(
     }
     for att_doc in attendance.find(att_query):
         sub = att_doc["subject"].lower()
-        if sub in subjects:
+        if sub in subject_set:
             result[sub.upper()]["attended"] += 1
 
-    # Debug sample
-    att_sample = attendance.find_one({"roll_no": roll_no})
-    print("Sample attendance:", att_sample, type(att_sample.get("marked_at")))
-
     # Totals
     total_classes = sum(stats["total"] for stats in result.values())
     total_attended = sum(stats["attended"] for stats in result.values())
-    print("total_attended", total_attended)
-    print("total class", total_classes)
 
     # Percentages
     for stats in result.values():
@@ -106,11 +104,12 @@ def attendance_target(
     target_percentage: float,
     from_date: str = Query(..., description="Start date in YYYY-MM-DD"),
     to_date: str = Query(None, description="End date in YYYY-MM-DD (default: today)"),
+    session: Optional[dict] = Depends(student_session),
 ):
     roll_no = str(roll_no)
 
     # 1. Get student info
-    student = approved_students.find_one({"roll_no": roll_no})
+    student = session_user(session, roll_no, lambda: approved_students.find_one({"roll_no": roll_no}, {"branch": 1, "semester": 1}))
     if not student:
         raise HTTPException(status_code=404, detail=f"Student with roll_no {roll_no} not found")
 
@@ -118,11 +117,10 @@ def attendance_target(
     branch = student.get("branch")
     semester = str(student.get("semester"))
 
-    if program not in SUBJECTS or branch not in SUBJECTS[program] or semester not in SUBJECTS[program][branch]:
+    subjects = subject_catalog.lower_subject_set(program, branch, semester)
+    if not subjects:
         raise HTTPException(status_code=400, detail="Subjects not defined for this branch/semester")
 
-    subjects = [s.lower() for s in SUBJECTS[program][branch][semester]]
-
     if subject.lower() not in subjects:
         raise HTTPException(status_code=400, detail=f"Subject '{subject}' not in student curriculum")
 
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from datetime import date
 from app.db.database import approved_students, approved_teachers
+from app.core.security import create_session_token
 
 router = APIRouter()
 
@@ -18,11 +19,22 @@ def login_student(data: StudentLoginRequest):
     student = approved_students.find_one({"roll_no": data.roll_no})
     if not student or str(student["dob"]) != str(data.dob):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    return {"message": "Login successful", "roll_no": data.roll_no}
+    # Later student calls send this as a bearer token instead of being looked up again
+    return {
+        "message": "Login successful",
+        "roll_no": data.roll_no,
+        "access_token": create_session_token("student", student),
+        "token_type": "bearer",
+    }
 
 @router.post("/login/teacher")
 def login_teacher(data: TeacherLoginRequest):
     teacher = approved_teachers.find_one({"employee_id": data.employee_id.upper()})
     if not teacher or str(teacher["dob"]) != str(data.dob):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    return {"message": "Login successful","employee_id": data.employee_id.upper()}
+    return {
+        "message": "Login successful",
+        "employee_id": data.employee_id.upper(),
+        "access_token": create_session_token("teacher", teacher),
+        "token_type": "bearer",
+    }
@@ -4,6 +4,7 @@ from datetime import datetime
 from bson import ObjectId
 from typing import List, Optional
 from app.db.database import classes, approved_students, attendance,otps  # imported collections
+from app.core.responses import FastJSONResponse
 
 router = APIRouter(
     prefix="/classes",
@@ -210,7 +211,8 @@ def get_class_register(
 
         student_register.append(row)
 
-    return {
+    # Returned directly: one orjson pass instead of jsonable_encoder over every cell
+    return FastJSONResponse({
         "class_info": {
             "department":class_data["department"],
             "course":class_data["course"],
@@ -221,7 +223,7 @@ def get_class_register(
         },
         "dates": date_list,
         "students": student_register
-    }
+    })
 
 
 @router.delete("/{class_id}")
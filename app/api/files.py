@@ -0,0 +1,121 @@
+# app/api/files.py
+import mimetypes
+import os
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from app.utils.attachment_store import DIGEST_RE, CHUNK_SIZE, blob_path
+
+router = APIRouter(tags=["Files"])
+
+# Blobs are addressed by content hash, so a given URL never changes content
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def _accepts_encoding(header: str, coding: str) -> bool:
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() not in (coding, "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _parse_range(header: str, size: int):
+    """Parse a single `bytes=` range. Returns (start, end) inclusive, or None if unsatisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_s, _, end_s = spec.strip().partition("-")
+    try:
+        if start_s == "":
+            length = int(end_s)
+            if length <= 0:
+                return None
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def _iter_file_range(path: str, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@router.get("/files/attachments/{digest}/{filename}")
+def get_attachment(digest: str, filename: str, request: Request):
+    if not DIGEST_RE.match(digest):
+        raise HTTPException(status_code=404, detail="File not found")
+    path = blob_path(digest)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    identity_etag = f'"{digest}"'
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    size = os.path.getsize(path)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # Ranges always address the identity bytes, so If-Range is checked against its ETag
+    serve_range = bool(range_header) and (not if_range or if_range == identity_etag)
+
+    # Full-body downloads can use a precompressed sibling when the client allows it
+    coding, served_path = None, path
+    if not serve_range:
+        accept_encoding = request.headers.get("accept-encoding", "")
+        for candidate, ext in (("br", ".br"), ("gzip", ".gz")):
+            if _accepts_encoding(accept_encoding, candidate) and os.path.exists(path + ext):
+                coding, served_path = candidate, path + ext
+                break
+
+    # Each encoding is different bytes, so each gets its own strong ETag
+    etag = f'"{digest}-{coding}"' if coding else identity_etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE,
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(filename)}",
+    }
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in if_none_match or if_none_match.strip() == "*":
+        return Response(status_code=304, headers={k: headers[k] for k in ("ETag", "Cache-Control", "Vary")})
+
+    if serve_range:
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}", "ETag": etag, "Vary": "Accept-Encoding"})
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _iter_file_range(path, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers,
+        )
+
+    if coding:
+        headers["Content-Encoding"] = coding
+    return FileResponse(served_path, media_type=media_type, headers=headers)
@@ -0,0 +1,12 @@
+# app/api/metrics.py
+from fastapi import APIRouter, Response
+from app.core.metrics import registry
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
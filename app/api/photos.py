@@ -0,0 +1,65 @@
+# app/api/photos.py
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.utils.photo_store import open_photo, open_thumbnail, pick_thumbnail_size
+
+router = APIRouter(tags=["Photos"])
+
+# A new upload always gets a new photo_id, so a photo URL never changes content
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Served while thumbnails are still being generated; revalidate soon to pick them up
+PENDING_VARIANT_CACHE = "public, max-age=60"
+
+
+def _stream(grid_out, etag: str, cache_control: str, vary: str = None):
+    metadata = grid_out.metadata or {}
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Content-Length": str(grid_out.length),
+    }
+    if vary:
+        headers["Vary"] = vary
+    # Whole GridFS chunks; iterating GridOut itself yields newline-split "lines" of binary data
+    return StreamingResponse(
+        iter(grid_out.readchunk, b""),
+        media_type=metadata.get("content_type", "application/octet-stream"),
+        headers=headers,
+    )
+
+
+@router.get("/photos/{photo_id}")
+def get_photo(
+    photo_id: str,
+    request: Request,
+    size: Optional[int] = Query(None, gt=0, description="Longest edge in px; served from the nearest precomputed size"),
+):
+    if_none_match = request.headers.get("if-none-match", "")
+
+    if size:
+        variant_size = pick_thumbnail_size(size)
+        content_type = "image/webp" if "image/webp" in request.headers.get("accept", "") else "image/jpeg"
+        etag = f'"{photo_id}-{variant_size}-{content_type.split("/")[1]}"'
+        if etag in if_none_match:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE, "Vary": "Accept"})
+
+        grid_out = open_thumbnail(photo_id, variant_size, content_type)
+        if grid_out is not None:
+            return _stream(grid_out, etag, IMMUTABLE_CACHE, vary="Accept")
+
+        # Not generated yet: fall back to the original for now
+        grid_out = open_photo(photo_id)
+        if grid_out is None:
+            raise HTTPException(status_code=404, detail="Photo not found")
+        return _stream(grid_out, f'"{photo_id}"', PENDING_VARIANT_CACHE, vary="Accept")
+
+    etag = f'"{photo_id}"'
+    if etag in if_none_match:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE})
+
+    grid_out = open_photo(photo_id)
+    if grid_out is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    return _stream(grid_out, etag, IMMUTABLE_CACHE)
@@ -1,55 +1,46 @@
 from fastapi import APIRouter, HTTPException
 from app.schemas.student import StudentRegister
 from app.schemas.teacher import TeacherRegister
-from app.db.database import (
-    pending_students, approved_students, rejected_students,
-    pending_teachers, approved_teachers, rejected_teachers
-)
+from app.db.database import pending_students, pending_teachers
+from app.utils.identity_registry import IdentityConflict, claim, confirm, release
+from app.utils.search_keys import name_keys
 
 router = APIRouter()
 
-def check_existing_user(field_name: str, value: str, collections: list):
-    for collection, status in collections:
-        if collection.find_one({field_name: value}):
-            return status
-    return None
+TEACHER_CONFLICT_MESSAGES = {
+    "employee_id": "An account with this Employee ID already exists or has a pending/rejected registration.",
+    "email": "This email address is already registered or has a pending/rejected registration.",
+    "phone": "This phone number is already registered or has a pending/rejected registration.",
+}
+
+
+def student_conflict_message(conflict: IdentityConflict) -> str:
+    field = conflict.kind.replace('_', ' ')
+    if conflict.status == "approved":
+        return f"This {field} has already been approved. Please log in using your credentials."
+    if conflict.status == "rejected":
+        return f"Registration using this {field} was previously rejected. Kindly contact the administrator for assistance."
+    return f"A registration request with this {field} is already pending. Please await verification."
 
 @router.post("/register/student")
 def register_student(student: StudentRegister):
     student_data = student.dict()
     student_data['dob'] = student_data['dob'].isoformat()
+    student_data['name_keys'] = name_keys(student_data['full_name'])
 
-    checks = [
-        ('roll_no', student_data['roll_no']),
-        ('phone', student_data['phone']),
-        ('email', student_data['email'])
-    ]
-
-    collections = [
-        (pending_students, "pending"),
-        (approved_students, "approved"),
-        (rejected_students, "rejected")
-    ]
+    # One insert against the identity registry's unique index replaces the per-field lookups
+    try:
+        claim("student", student_data)
+    except IdentityConflict as conflict:
+        raise HTTPException(status_code=400, detail=student_conflict_message(conflict))
 
-    for field, value in checks:
-        status = check_existing_user(field, value, collections)
-        if status == "pending":
-            raise HTTPException(
-                status_code=400,
-                detail=f"A registration request with this {field.replace('_', ' ')} is already pending. Please await verification."
-            )
-        elif status == "approved":
-            raise HTTPException(
-                status_code=400,
-                detail=f"This {field.replace('_', ' ')} has already been approved. Please log in using your credentials."
-            )
-        elif status == "rejected":
-            raise HTTPException(
-                status_code=400,
-                detail=f"Registration using this {field.replace('_', ' ')} was previously rejected. Kindly contact the administrator for assistance."
-            )
-
-    pending_students.insert_one(student_data)
+    try:
+        pending_students.insert_one(student_data)
+    except Exception:
+        release("student", [student_data['roll_no']])
+        raise
+    # Until this runs the claims stay marked unconfirmed, so a crash in between is cleaned up later
+    confirm("student", [student_data['roll_no']])
     return {
         "message": f"Registration request submitted successfully for {student_data['full_name']} (Roll No: {student_data['roll_no']}). Please await verification."
     }
@@ -59,46 +50,22 @@ def register_student(student: StudentRegister):
 def register_teacher(teacher: TeacherRegister):
     teacher_data = teacher.dict()
     teacher_data["dob"] = teacher_data["dob"].isoformat()
+    teacher_data["name_keys"] = name_keys(teacher_data["full_name"])
 
     employee_id = teacher_data["employee_id"]
-    email = teacher_data["email"]
-    phone = teacher_data["phone"]
-
-    # Check for duplicate employee_id
-    if (
-        pending_teachers.find_one({"employee_id": employee_id}) or
-        approved_teachers.find_one({"employee_id": employee_id}) or
-        rejected_teachers.find_one({"employee_id": employee_id})
-    ):
-        raise HTTPException(
-            status_code=400,
-            detail="An account with this Employee ID already exists or has a pending/rejected registration."
-        )
-
-    # Check for duplicate email
-    if (
-        pending_teachers.find_one({"email": email}) or
-        approved_teachers.find_one({"email": email}) or
-        rejected_teachers.find_one({"email": email})
-    ):
-        raise HTTPException(
-            status_code=400,
-            detail="This email address is already registered or has a pending/rejected registration."
-        )
 
-    # Check for duplicate phone number
-    if (
-        pending_teachers.find_one({"phone": phone}) or
-        approved_teachers.find_one({"phone": phone}) or
-        rejected_teachers.find_one({"phone": phone})
-    ):
-        raise HTTPException(
-            status_code=400,
-            detail="This phone number is already registered or has a pending/rejected registration."
-        )
+    try:
+        claim("teacher", teacher_data)
+    except IdentityConflict as conflict:
+        raise HTTPException(status_code=400, detail=TEACHER_CONFLICT_MESSAGES[conflict.kind])
 
     # Insert registration request
-    pending_teachers.insert_one(teacher_data)
+    try:
+        pending_teachers.insert_one(teacher_data)
+    except Exception:
+        release("teacher", [employee_id])
+        raise
+    confirm("teacher", [employee_id])
     return {
         "message": f"Registration request submitted successfully for {teacher_data['full_name']} (Employee ID: {employee_id}). Please await verification."
     }
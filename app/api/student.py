@@ -1,16 +1,22 @@
 # app/api/student.py
-from fastapi import APIRouter, HTTPException, UploadFile, File 
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
 from app.db.database import otps, attendance, approved_students, approved_teachers, notifications
-from app.core.config import SUBJECTS
+from app.core.subject_catalog import subject_catalog
 from pydantic import BaseModel
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from io import StringIO
 import csv
 import pytz
 import math
 from typing import Optional
-import base64
 from datetime import date, timedelta, datetime
+from app.utils.photo_store import replace_photo, photo_url
+from app.utils.search_keys import name_keys
+from app.utils.identity_registry import IdentityConflict, change_identifier
+from app.core.security import student_session, session_user
+from app.core.responses import FastJSONResponse
+from app.utils.notification_inbox import feed_entries, class_key, TEACHER
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371000  # meters
@@ -45,17 +51,17 @@ class ProfileUpdate(BaseModel):
     dob: Optional[date] = None
 
 @router.post("/student/markAttendance")
-def mark_attendance(req: MarkAttendanceRequest):
+def mark_attendance(req: MarkAttendanceRequest, session: Optional[dict] = Depends(student_session)):
     roll_no = req.roll_no.upper()
     otp = req.otp
     subject = req.subject.strip().lower()
     visitor_id = req.visitorId
 
-    SUBJECTS_LOWER = [s.lower() for s in SUBJECTS]
-    # if subject not in SUBJECTS_LOWER:
+    # if not subject_catalog.is_known(subject):
     #     raise HTTPException(status_code=400, detail="Invalid subject")
 
-    student = approved_students.find_one({"roll_no": roll_no})
+    # The session token carries full_name/branch/section, so no profile read is needed
+    student = session_user(session, roll_no, lambda: approved_students.find_one({"roll_no": roll_no}))
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
@@ -170,8 +176,7 @@ def view_attendance(roll_no: str, subject: str = None):
 
     if subject:
         subject = subject.strip().lower()
-        SUBJECTS_LOWER = [s.lower() for s in SUBJECTS]
-        if subject not in SUBJECTS_LOWER:
+        if not subject_catalog.is_known(subject):
             raise HTTPException(status_code=400, detail="Invalid subject")
         query["subject"] = subject
 
@@ -189,7 +194,7 @@ def view_attendance(roll_no: str, subject: str = None):
             "marked_at": marked_at_ist
         })
 
-    return result
+    return FastJSONResponse(result)
 
 @router.get("/student/check-otp/{otp}")
 def check_otp(otp: str):
@@ -244,7 +249,7 @@ async def export_attendance_csv(roll_no: str):
 @router.get("/student/profile/{roll_no}")
 def get_student_profile(roll_no: str):
     roll_no = roll_no.upper()
-    student = approved_students.find_one({"roll_no": roll_no})
+    student = approved_students.find_one({"roll_no": roll_no}, {"photo": 0})
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
@@ -259,7 +264,7 @@ def get_student_profile(roll_no: str):
         "semester": student.get("semester"),
         "section": student.get("section"),
         "roll_no": student.get("roll_no"),
-        "photo": student.get("photo")
+        "photo_url": photo_url(student.get("photo_id"))
         
         # add more fields if needed
     }
@@ -289,24 +294,18 @@ def get_active_otps(employee_id: str):
     return result
 
 @router.post("/student/profile/upload-photo/{roll_no}")
-async def upload_student_photo(roll_no: str, file: UploadFile = File(...)):
+async def upload_student_photo(roll_no: str, file: UploadFile = File(...), session: Optional[dict] = Depends(student_session)):
     roll_no = roll_no.upper()
-    student = approved_students.find_one({"roll_no": roll_no})
+    student = session_user(session, roll_no, lambda: approved_students.find_one({"roll_no": roll_no}, {"_id": 1}))
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
 
-    # Convert image file to base64 string
+    # Store raw bytes in the photo store; the profile only keeps the photo_id
     content = await file.read()
-    encoded_str = base64.b64encode(content).decode("utf-8")
-    
-    # Update student profile
-    approved_students.update_one(
-        {"roll_no": roll_no},
-        {"$set": {"photo": encoded_str}}
-    )
+    photo_id = await run_in_threadpool(replace_photo, approved_students, {"roll_no": roll_no}, content, file.content_type, "student", roll_no)
 
-    return {"message": "Photo uploaded successfully"}
+    return {"message": "Photo uploaded successfully", "photo_url": photo_url(photo_id)}
 
 
 
@@ -324,6 +323,7 @@ async def update_student_profile(roll_no: str, update: ProfileUpdate):
     # Allow updating full_name, email, branch, section
     if update.full_name is not None:
         update_fields["full_name"] = update.full_name.strip()
+        update_fields["name_keys"] = name_keys(update_fields["full_name"])
 
     if update.email is not None:
         update_fields["email"] = update.email.strip().lower()
@@ -345,6 +345,13 @@ async def update_student_profile(roll_no: str, update: ProfileUpdate):
     if not update_fields:
         raise HTTPException(status_code=400, detail="No valid fields to update")
 
+    if "email" in update_fields:
+        # Claim the new address first so two students can't end up sharing one
+        try:
+            change_identifier("student", roll_no, "email", student.get("email"), update_fields["email"])
+        except IdentityConflict:
+            raise HTTPException(status_code=400, detail="This email address is already registered")
+
     approved_students.update_one(
         {"roll_no": roll_no},
         {"$set": update_fields}
@@ -356,16 +363,19 @@ async def update_student_profile(roll_no: str, update: ProfileUpdate):
 @router.get("/student/notifications/{branch}/{section}/{semester}")
 def get_notifications(branch: str, section: str, semester: str):
     now = datetime.utcnow()
-    notifs = list(notifications.find({
-        "target_branch": branch.upper(),
-        "target_section": section.upper(),
-        "target_semester": semester,
-        "expiry_time": {"$gte": now}
-    }).sort("timestamp", -1))
+    entries = feed_entries([class_key(branch, section, semester)], now, source=TEACHER)
+    ids = [e["notification_id"] for e in entries]
+    by_id = {n["_id"]: n for n in notifications.find({"_id": {"$in": ids}})} if ids else {}
+    notifs = [by_id[i] for i in ids if i in by_id]
+
+    sender_ids = list({n["sender_id"] for n in notifs})
+    teacher_names = {
+        t["employee_id"]: t.get("full_name", "Unknown")
+        for t in approved_teachers.find({"employee_id": {"$in": sender_ids}}, {"_id": 0, "employee_id": 1, "full_name": 1})
+    } if sender_ids else {}
 
     results = []
     for n in notifs:
-        teacher = approved_teachers.find_one({"employee_id": n["sender_id"]})
         ist_timestamp = n["timestamp"] + timedelta(hours=5, minutes=30)
         results.append({
             "message": n["message"],
@@ -373,7 +383,7 @@ def get_notifications(branch: str, section: str, semester: str):
             # "timestamp": n["timestamp"],
             "timestamp": ist_timestamp,
             "expiry_time": n["expiry_time"],
-            "teacher_name": teacher.get("full_name", "Unknown") if teacher else "Unknown"
+            "teacher_name": teacher_names.get(n["sender_id"], "Unknown")
         })
 
-    return results
+    return FastJSONResponse(results)
@@ -1,14 +1,10 @@
 # app/api/student_notifications.py
 from fastapi import APIRouter, HTTPException
-from pymongo import MongoClient
 from datetime import datetime
 import os
-
-client = MongoClient(os.getenv("MONGO_URI", "mongodb+srv://<your-uri>"))
-db = client["uietattendance"]
-
-teacher_notifications = db["notifications"]
-admin_notifications = db["adminnotifications"]
+from app.utils.notification_inbox import feed_entries, student_audiences, TEACHER, ADMIN
+from app.db.database import notifications as teacher_notifications, admin_notifications
+from app.core.responses import FastJSONResponse
 
 router = APIRouter(prefix="/student", tags=["Student Notifications"])
 
@@ -64,58 +60,25 @@ async def get_student_notifications(branch: str, section: str, semester: str, ro
     try:
         now = datetime.utcnow()
 
-        # Teacher notifications
-        # t_query = {
-        #     "$or": [
-        #         {"target_branch": branch, "target_section": section, "target_semester": semester},
-        #         {"target_type": "all"},
-        #         {"target_type": "individual", "roll_numbers": {"$in": [roll_no.upper()]}},
-        #     ]
-        # }
-        # Teacher notifications
-        t_query = {
-            "$or": [
-                # Match teacher’s branch/section/semester
-                {
-                    "target_branch": branch,
-                    "target_section": section,
-                    "target_semester": semester,
-                },
-                # If you later add support for global/individual targeting in teacher notifs
-                {"target_type": "all"},
-                {"target_type": "individual", "roll_numbers": {"$in": [roll_no.upper()]}}
-            ]
-        }
+        # Point lookups on the student's audience keys (class, all, roll_no); newest first
+        entries = feed_entries(student_audiences(branch, section, semester, roll_no), now)
 
-        t_notifs = teacher_notifications.find(t_query)
-
-        # Admin notifications
-        a_query = {
-            "$or": [
-                {"target_type": "all"},
-                {"target_type": "class", "branch": branch, "section": section, "semester": semester},
-                {"target_type": "individual", "roll_numbers": {"$in": [roll_no.upper()]}},
-            ]
-        }
-        a_notifs = admin_notifications.find(a_query)
+        teacher_ids = [e["notification_id"] for e in entries if e["source"] == TEACHER]
+        admin_ids = [e["notification_id"] for e in entries if e["source"] == ADMIN]
+        t_notifs = {n["_id"]: n for n in teacher_notifications.find({"_id": {"$in": teacher_ids}})} if teacher_ids else {}
+        a_notifs = {n["_id"]: n for n in admin_notifications.find({"_id": {"$in": admin_ids}})} if admin_ids else {}
 
         merged = []
-
-        # Serialize teacher notifs
-        for n in t_notifs:
-            data = teacher_notif_serializer(n)
-            if data["expiry_time"] > now:
+        for e in entries:
+            if e["source"] == TEACHER:
+                n = t_notifs.get(e["notification_id"])
+                data = teacher_notif_serializer(n) if n else None
+            else:
+                n = a_notifs.get(e["notification_id"])
+                data = admin_notif_serializer(n) if n else None
+            if data and data["expiry_time"] > now:
                 merged.append(data)
 
-        # Serialize admin notifs
-        for n in a_notifs:
-            data = admin_notif_serializer(n)
-            if data["expiry_time"] > now:
-                merged.append(data)
-
-        # Sort latest first
-        merged.sort(key=lambda x: x["timestamp"], reverse=True)
-
-        return merged
+        return FastJSONResponse(merged)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,9 +1,16 @@
 # app/api/subjects.py
-from fastapi import APIRouter
-from app.core.config import SUBJECTS
+from fastapi import APIRouter, Request, Response
+from app.core.subject_catalog import subject_catalog
 
 router = APIRouter()
 
+# The catalog only changes with a deploy, so clients may reuse it briefly and then revalidate
+SUBJECTS_CACHE = "public, max-age=300"
+
 @router.get("/subjects")
-def get_subjects():
-    return SUBJECTS
+def get_subjects(request: Request):
+    headers = {"ETag": subject_catalog.etag, "Cache-Control": SUBJECTS_CACHE}
+    if subject_catalog.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    # Serialized once at startup; no per-request encoding of the nested dict
+    return Response(content=subject_catalog.json_bytes, media_type="application/json", headers=headers)
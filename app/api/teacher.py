@@ -1,20 +1,26 @@
 # app/api/teacher.py
-from fastapi import APIRouter, HTTPException, UploadFile, File, HTTPException
+from fastapi import APIRouter, HTTPException, UploadFile, File, HTTPException, Depends
 from datetime import datetime, timedelta
 from app.db.database import otps, attendance, approved_teachers, approved_students
 from app.core.config import SUBJECTS
+from app.core.subject_catalog import subject_catalog
 from app.utils.otp_utils import generate_otp
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from io import StringIO
 import csv
 import pytz
-import base64
 from app.db.database import notifications
 from fastapi import Form
+from fastapi.concurrency import run_in_threadpool
+from app.utils.attachment_store import store_attachment, release_attachment
+from app.utils import notification_inbox
+from app.utils.photo_store import replace_photo, photo_url
 from bson import ObjectId
 import os
-from typing import List
+from typing import List, Optional
+from app.core.security import teacher_session, session_user
+from app.core.responses import FastJSONResponse
 from zoneinfo import ZoneInfo
 
 
@@ -57,22 +63,18 @@ def get_subjects(branch: str, semester: str):
     return SUBJECTS[branch][semester]
 
 @router.post("/teacher/generate-otp")
-def generate_otp_route(data: GenerateOtpRequest):
+def generate_otp_route(data: GenerateOtpRequest, session: Optional[dict] = Depends(teacher_session)):
     # print("DATA RECEIVED:", data.dict())
     course = data.course.upper()
     branch = data.branch.upper()
     semester = data.semester
 
-    if (
-        course not in SUBJECTS or
-        branch not in SUBJECTS[course] or
-        semester not in SUBJECTS[course][branch] or
-        data.subject not in SUBJECTS[course][branch][semester]
-    ):
+    if not subject_catalog.has_subject(course, branch, semester, data.subject):
         raise HTTPException(status_code=400, detail="Invalid subject for given course/branch/semester")
 
 
-    teacher = approved_teachers.find_one({"employee_id": data.employee_id.upper()})
+    employee_id = data.employee_id.upper()
+    teacher = session_user(session, employee_id, lambda: approved_teachers.find_one({"employee_id": employee_id}, {"_id": 1}))
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
@@ -110,8 +112,8 @@ def generate_otp_route(data: GenerateOtpRequest):
     }
 
 @router.get("/teacher/view-attendance/{employee_id}")
-def view_attendance(employee_id: str):
-    teacher = approved_teachers.find_one({"employee_id": employee_id.upper()})
+def view_attendance(employee_id: str, session: Optional[dict] = Depends(teacher_session)):
+    teacher = session_user(session, employee_id, lambda: approved_teachers.find_one({"employee_id": employee_id.upper()}, {"_id": 1}))
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
@@ -140,7 +142,7 @@ def view_attendance(employee_id: str):
             "otp": r.get("otp") 
         })
 
-    return result
+    return FastJSONResponse(result)
 
 # @router.get("/teacher/export-attendance/{employee_id}")
 # def export_attendance(employee_id: str):
@@ -185,7 +187,7 @@ def view_attendance(employee_id: str):
 @router.get("/teacher/profile/{employee_id}")
 def get_teacher_profile(employee_id: str):
     employee_id = employee_id.upper()
-    teacher = approved_teachers.find_one({"employee_id": employee_id})
+    teacher = approved_teachers.find_one({"employee_id": employee_id}, {"photo": 0})
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher  not found")
     
@@ -199,7 +201,7 @@ def get_teacher_profile(employee_id: str):
         "address": teacher.get("address"),
         "employee_id": teacher.get("employee_id"),
         "subject": teacher.get("subject"),
-        "photo": teacher.get("photo")
+        "photo_url": photo_url(teacher.get("photo_id"))
     }
 
 @router.get("/teacher/todays-otps/{employee_id}")
@@ -272,32 +274,27 @@ def get_subjects(course: str, branch: str, semester: str):
         raise HTTPException(status_code=404, detail="Course not found")
     if branch not in SUBJECTS[course]:
         raise HTTPException(status_code=404, detail="Branch not found in this course")
-    if semester not in SUBJECTS[course][branch]:
+    subjects = subject_catalog.semester_subjects(course, branch, semester)
+    if subjects is None:
         raise HTTPException(status_code=404, detail="Semester not found in this branch")
     
-    return SUBJECTS[course][branch][semester]
+    return list(subjects)
 
 
 
 @router.post("/teacher/profile/upload-photo/{employee_id}")
-async def upload_teacher_photo(employee_id: str, file: UploadFile = File(...)):
+async def upload_teacher_photo(employee_id: str, file: UploadFile = File(...), session: Optional[dict] = Depends(teacher_session)):
     employee_id = employee_id.upper()
-    teacher = approved_teachers.find_one({"employee_id": employee_id})
+    teacher = session_user(session, employee_id, lambda: approved_teachers.find_one({"employee_id": employee_id}, {"_id": 1}))
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
     
 
-    # Convert image file to base64 string
+    # Store raw bytes in the photo store; the profile only keeps the photo_id
     content = await file.read()
-    encoded_str = base64.b64encode(content).decode("utf-8")
-    
-    # Update teacher profile
-    approved_teachers.update_one(
-        {"employee_id": employee_id},
-        {"$set": {"photo": encoded_str}}
-    )
+    photo_id = await run_in_threadpool(replace_photo, approved_teachers, {"employee_id": employee_id}, content, file.content_type, "teacher", employee_id)
 
-    return {"message": "Photo uploaded successfully"}
+    return {"message": "Photo uploaded successfully", "photo_url": photo_url(photo_id)}
 
 
 
@@ -309,63 +306,61 @@ async def send_notification(
     section: str = Form(...),
     semester: str = Form(...),
     expiry_time: str = Form(...),  # ISO format expected
-    file: UploadFile = File(None)
+    file: UploadFile = File(None),
+    session: Optional[dict] = Depends(teacher_session),
 ):
-    teacher = approved_teachers.find_one({"employee_id": employee_id.upper()})
+    teacher = session_user(session, employee_id, lambda: approved_teachers.find_one({"employee_id": employee_id.upper()}, {"_id": 1}))
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
     file_url = None
+    attachment_digest = None
     if file:
-        content = await file.read()
-        filename = f"{employee_id}_{datetime.utcnow().timestamp()}_{file.filename}"
-        filepath = f"uploads/notifications/{filename}"
-        with open(filepath, "wb") as f:
-            f.write(content)
-        file_url = f"/files/notifications/{filename}"  # Serve via StaticFiles
+        # Content-addressed: the same circular sent to many sections is stored once
+        stored = await run_in_threadpool(store_attachment, file.file, file.filename, file.content_type)
+        file_url = stored["url"]
+        attachment_digest = stored["digest"]
     
-    notifications.insert_one({
+    notif = {
         "sender_id": employee_id.upper(),
         "message": message,
         "file_url": file_url,
+        "attachment_digest": attachment_digest,
         "target_branch": branch.upper(),
         "target_section": section.upper(),
         "target_semester": semester,
         "timestamp": datetime.now(INDT),
         "expiry_time": datetime.fromisoformat(expiry_time)
-    })
+    }
+    notifications.insert_one(notif)
+    notification_inbox.fan_out_teacher_notification(notif)
 
     return {"message": "Notification sent successfully"}
 
 
 
 @router.get("/teacher/notifications/{employee_id}")
-def get_sent_notifications(employee_id: str):
+def get_sent_notifications(employee_id: str, session: Optional[dict] = Depends(teacher_session)):
     employee_id = employee_id.upper()
-    teacher = approved_teachers.find_one({"employee_id": employee_id})
+    teacher = session_user(session, employee_id, lambda: approved_teachers.find_one({"employee_id": employee_id}, {"_id": 1}))
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
-    results = []
-    for notif in notifications.find({"sender_id": employee_id}).sort("timestamp", -1):
-        notif["_id"] = str(notif["_id"])  # Convert ObjectId to string
-        notif["expiry_time"] = notif["expiry_time"].isoformat()
-        notif["timestamp"] = notif["timestamp"].isoformat()
-        results.append(notif)
-
-    return results
+    # ObjectId and datetimes are encoded by the response class
+    return FastJSONResponse(list(notifications.find({"sender_id": employee_id}).sort("timestamp", -1)))
 
 
 
 @router.post("/teacher/notifications/delete")
 def delete_notification(
     notification_id: str = Form(...),
-    employee_id: str = Form(...)
+    employee_id: str = Form(...),
+    session: Optional[dict] = Depends(teacher_session),
 ):
     employee_id = employee_id.upper()
 
-    # Check if teacher exists
-    teacher = approved_teachers.find_one({"employee_id": employee_id})
+    # Check if teacher exists (a valid session token already proves it)
+    teacher = session_user(session, employee_id, lambda: approved_teachers.find_one({"employee_id": employee_id}, {"_id": 1}))
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
@@ -377,14 +372,17 @@ def delete_notification(
     if not notif:
         raise HTTPException(status_code=404, detail="Notification not found or not authorized")
 
-    # Delete the attached file if any
-    if notif.get("file_url"):
+    # Release the attached file if any
+    if notif.get("attachment_digest"):
+        release_attachment(notif["attachment_digest"])
+    elif notif.get("file_url"):
         filepath = notif["file_url"].replace("/files", "uploads")
         if os.path.exists(filepath):
             os.remove(filepath)
 
-    # Delete the notification document
+    # Delete the notification document and its inbox entries
     notifications.delete_one({"_id": ObjectId(notification_id)})
+    notification_inbox.remove(ObjectId(notification_id))
 
     return {"message": "Notification deleted successfully"}
 
@@ -0,0 +1,164 @@
+# app/core/compression.py
+# Negotiated brotli/gzip for text-like responses (JSON, NDJSON, CSV, ...). Works on
+# the raw ASGI messages so StreamingResponse exports are compressed chunk by chunk.
+import zlib
+
+from app.core.config import COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def choose_encoding(accept_encoding: str):
+    """Best of br/gzip the client accepts (q > 0), preferring br on a tie."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda e: accepted.get(e, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31 = gzip container
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        """Compress a chunk; flush=True pushes out everything so far (stream stays open)."""
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + self._br.flush() if flush else out
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_FINISH)
+
+
+def _header(headers, name: bytes):
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _compressible(start: dict) -> bool:
+    headers = start.get("headers", [])
+    if start["status"] < 200 or start["status"] in (204, 206, 304):
+        return False
+    if _header(headers, b"content-encoding") is not None or _header(headers, b"content-range") is not None:
+        return False  # precompressed attachment variants and range responses stay as they are
+    if b"no-transform" in (_header(headers, b"cache-control") or b""):
+        return False
+    content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least `min_size` bytes. A streamed body is buffered
+    only until it crosses min_size; after that every chunk is compressed and
+    flushed as it arrives, so NDJSON/CSV streams stay incremental.
+    """
+
+    def __init__(self, app, min_size: int = None, gzip_level: int = None, brotli_quality: int = None):
+        self.app = app
+        self.min_size = COMPRESSION_MIN_SIZE if min_size is None else min_size
+        self.gzip_level = COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding((_header(scope.get("headers", []), b"accept-encoding") or b"").decode("latin-1"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        buffered = []
+        size = 0
+        compressor = None
+        passthrough = False
+
+        def compressed_start(content_length=None):
+            headers = [
+                (k, v) for k, v in start.get("headers", [])
+                if k.lower() not in (b"content-length", b"content-encoding")
+            ]
+            vary = _header(headers, b"vary")
+            headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+            headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+            headers.append((b"content-encoding", encoding.encode()))
+            etag = _header(headers, b"etag")
+            if etag and not etag.startswith(b"W/"):
+                # Byte-for-byte different from the identity representation
+                headers = [(k, b"W/" + v if k.lower() == b"etag" else v) for k, v in headers]
+            if content_length is not None:
+                headers.append((b"content-length", str(content_length).encode()))
+            return {**start, "headers": headers}
+
+        async def send_wrapper(message):
+            nonlocal start, size, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                passthrough = not _compressible(message)
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+
+            if compressor is not None:
+                # Already streaming compressed output
+                data = compressor.compress(body, flush=True) if more else compressor.finish(body)
+                return await send({"type": "http.response.body", "body": data, "more_body": more})
+
+            buffered.append(body)
+            size += len(body)
+            if size < self.min_size:
+                if more:
+                    return
+                # Whole body is small: not worth the CPU or the extra header bytes
+                await send(start)
+                return await send({"type": "http.response.body", "body": b"".join(buffered), "more_body": False})
+
+            compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+            data = b"".join(buffered)
+            buffered.clear()
+            if not more:
+                data = compressor.finish(data)
+                await send(compressed_start(len(data)))
+                return await send({"type": "http.response.body", "body": data, "more_body": False})
+            await send(compressed_start())
+            await send({"type": "http.response.body", "body": compressor.compress(data, flush=True), "more_body": True})
+
+        await self.app(scope, receive, send_wrapper)
@@ -6,15 +6,67 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
+# student/teacher login tokens; short-lived because their claims (branch, section, ...) are not re-read
+SESSION_TOKEN_EXPIRE_MINUTES = int(os.getenv("SESSION_TOKEN_EXPIRE_MINUTES", 60))
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL") 
 MONGO_URI = os.getenv("MONGO_URI")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "uietattendance")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 60000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+# 0 = no socket timeout (long aggregations and bulk imports)
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 0))
+# Wire compression offered to the server, e.g. "zstd,zlib" (zstd/snappy need their extra packages)
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zlib")
 ADMIN_ID = os.getenv("ADMIN_ID")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
 SMTP_SERVER = os.getenv("SMTP_SERVER")
-SMTP_PORT = int(os.getenv("SMTP_PORT"))
+SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+SMTP_IDLE_TIMEOUT_SECONDS = float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", 60))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", 30))
 SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 URL = os.getenv("url")
+# Short-lived shared state (admin OTPs): "memory" (single worker only), "mongo" or "redis"
+TTL_STORE_BACKEND = os.getenv("TTL_STORE_BACKEND", "mongo")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Prometheus /metrics endpoint plus request timing middleware and MongoDB command listener
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Commands slower than this (ms) go to the capped slow_queries collection with their explain plan; 0 disables
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+SLOW_QUERY_LOG_BYTES = int(os.getenv("SLOW_QUERY_LOG_BYTES", 16 * 1024 * 1024))
+# Token buckets as "<requests>/<seconds>" ("0" disables); backend "memory" (per worker) or "mongo" (shared)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "10/60")
+RATE_LIMIT_ATTENDANCE = os.getenv("RATE_LIMIT_ATTENDANCE", "6/60")
+RATE_LIMIT_PER_IP = os.getenv("RATE_LIMIT_PER_IP", "600/60")
+# Requests in flight per worker before new ones get an immediate 503 ("0" disables)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", 200))
+# Only behind a proxy that sets X-Forwarded-For itself; otherwise clients can spoof it
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+# gzip/brotli for compressible responses of at least COMPRESSION_MIN_SIZE bytes; higher levels trade CPU for bandwidth
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+# "split": pending_/approved_/rejected_ collections per role; "unified": one collection per role with a status field
+USER_STORE = os.getenv("USER_STORE", "split")
+PHOTO_THUMBNAIL_WORKERS = int(os.getenv("PHOTO_THUMBNAIL_WORKERS", 2))
+BULK_IMPORT_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS", 2))
+# Finished bulk jobs (uploaded sheet, result workbook, per-row results) are purged after this
+BULK_JOB_RETENTION_SECONDS = int(os.getenv("BULK_JOB_RETENTION_SECONDS", 7 * 24 * 3600))
+EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", 2))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 6))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", 5))
+# Sent outbox entries (already stripped of their body) are dropped by a TTL index after this
+EMAIL_SENT_RETENTION_SECONDS = int(os.getenv("EMAIL_SENT_RETENTION_SECONDS", 7 * 24 * 3600))
 
 
 SUBJECTS = {
@@ -0,0 +1,144 @@
+# app/core/email_outbox.py
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, ReturnDocument
+from app.core.config import EMAIL_OUTBOX_WORKERS, EMAIL_MAX_ATTEMPTS, EMAIL_RETRY_BASE_SECONDS, EMAIL_POLL_SECONDS
+from app.core.email_utils import send_email, smtp_pool
+from app.db.database import email_outbox
+
+logger = logging.getLogger(__name__)
+
+# A message stuck in "sending" past this (worker died mid-send) is picked up again
+SEND_LOCK = timedelta(minutes=5)
+MAX_BACKOFF_SECONDS = 3600
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_wake = threading.Event()
+_stop = threading.Event()
+_threads = []
+
+
+def enqueue_email(to_email: str, subject: str, message: str):
+    """Queue a message for background delivery and return immediately."""
+    now = datetime.utcnow()
+    result = email_outbox.insert_one({
+        "to": to_email,
+        "subject": subject,
+        "message": message,
+        "status": "queued",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "sent_at": None,
+        "last_error": None,
+    })
+    _wake.set()
+    return result.inserted_id
+
+
+def retry_delay(attempts: int) -> float:
+    # Exponential backoff with jitter: 30s, 60s, 120s ... capped at an hour
+    delay = min(EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_next():
+    now = datetime.utcnow()
+    return email_outbox.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "locked_until": {"$lt": now}},
+            ]
+        },
+        {"$set": {"status": "sending", "locked_until": now + SEND_LOCK, "worker": WORKER_ID}},
+        sort=[("next_attempt_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def deliver(msg: dict):
+    try:
+        send_email(msg["to"], msg["subject"], msg["message"])
+    except Exception as e:
+        attempts = msg.get("attempts", 0) + 1
+        if attempts >= EMAIL_MAX_ATTEMPTS:
+            logger.error("Dead-lettering email %s to %s after %s attempts: %s", msg["_id"], msg["to"], attempts, e)
+            update = {"status": "dead", "attempts": attempts, "last_error": str(e)}
+        else:
+            update = {
+                "status": "queued",
+                "attempts": attempts,
+                "last_error": str(e),
+                "next_attempt_at": datetime.utcnow() + timedelta(seconds=retry_delay(attempts)),
+            }
+        email_outbox.update_one({"_id": msg["_id"]}, {"$set": update})
+        return False
+
+    # The body can hold secrets (admin OTP codes); only the delivery record is kept
+    email_outbox.update_one(
+        {"_id": msg["_id"]},
+        {
+            "$set": {"status": "sent", "sent_at": datetime.utcnow(), "attempts": msg.get("attempts", 0) + 1},
+            "$unset": {"message": ""},
+        },
+    )
+    return True
+
+
+def process_once() -> bool:
+    """Deliver one due message. Returns False when nothing is due."""
+    msg = claim_next()
+    if not msg:
+        return False
+    deliver(msg)
+    return True
+
+
+def _worker():
+    while not _stop.is_set():
+        try:
+            if process_once():
+                continue
+        except Exception:
+            logger.exception("Email outbox worker error")
+        _wake.wait(EMAIL_POLL_SECONDS)
+        _wake.clear()
+
+
+def start_outbox_workers():
+    _stop.clear()
+    for i in range(EMAIL_OUTBOX_WORKERS):
+        thread = threading.Thread(target=_worker, name=f"email-outbox-{i}", daemon=True)
+        thread.start()
+        _threads.append(thread)
+
+
+def stop_outbox_workers():
+    _stop.set()
+    _wake.set()
+    for thread in _threads:
+        thread.join(timeout=5)
+    _threads.clear()
+    smtp_pool.close_all()
+
+
+def outbox_stats() -> dict:
+    counts = {s: 0 for s in ("queued", "sending", "sent", "dead")}
+    for row in email_outbox.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+        counts[row["_id"]] = row["count"]
+    return counts
+
+
+def requeue_dead() -> int:
+    result = email_outbox.update_many(
+        {"status": "dead"},
+        {"$set": {"status": "queued", "attempts": 0, "next_attempt_at": datetime.utcnow()}},
+    )
+    _wake.set()
+    return result.modified_count
@@ -0,0 +1,84 @@
+# app/core/email_templates.py
+# Account decision emails: each returns (subject, message)
+
+
+def student_approved_email(name: str):
+    subject = "Your Student Account Has Been Approved!"
+
+    message = f"""
+    Dear {name},
+
+    We are pleased to inform you that your student account has been successfully approved on the College Attendance Management System.
+
+    You can now log in to your account and start using the following features:
+    • Mark your attendance using the secure OTP system  
+    • View and track your attendance history  
+    • Stay informed about schedules, notices, and updates  
+
+    If you have any questions or need assistance, please contact the system administrator or your department office.
+
+    We warmly welcome you to the platform and wish you great success in your academic journey.
+
+    Best regards,  
+    College Attendance Management Team
+    """
+    return subject, message
+
+
+def student_rejected_email(name: str):
+    subject = "Update on Your Student Account Registration"
+    message = f"""
+    Dear {name},
+
+    Thank you for registering on our College Attendance Management System.
+    We regret to inform you that your registration could not be approved at this time due to certain issues or discrepancies identified during the verification process.
+    If you believe this is an error or if you require further clarification, please contact the college administration or visit the department office responsible for student registration.
+
+    We appreciate your understanding and cooperation.
+
+    Best regards,  
+    College Attendance Team
+    """
+    return subject, message
+
+
+def teacher_approved_email(name: str):
+    subject = "Your Teacher Account Has Been Approved!"
+    message = f"""
+    Dear {name},
+
+    We are pleased to inform you that your teacher account has been successfully approved on the College Attendance Management System.
+
+    You may now log in to your account and access the following features:
+    - Generate and manage OTP-based attendance  
+    - View your attendance history  
+    - Stay informed about class activities and updates
+
+    If you have any questions or require assistance, please do not hesitate to contact the system administrator or support team.
+
+    Welcome aboard, and thank you for being a part of our academic community.
+
+    Best regards,  
+    College Attendance Team
+    """
+    return subject, message
+
+
+def teacher_rejected_email(name: str):
+    subject = "Update on Your Teacher Account Registration"
+    message = f"""
+    Dear {name},
+
+    Thank you for registering on our College Attendance Management System.
+
+    We regret to inform you that your registration could not be approved at this time due to certain issues or discrepancies identified during the verification process.
+
+    If you believe this is an error or if you require further clarification, please contact the college administration or visit the department office responsible for teacher registration.
+
+    We appreciate your understanding and cooperation.
+
+    Best regards,  
+    College Attendance Team
+
+    """
+    return subject, message
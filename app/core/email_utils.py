@@ -1,6 +1,159 @@
+import queue
 import smtplib
+import socket
+import threading
+import time
 from email.mime.text import MIMEText
-from app.core.config import SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD
+from app.core.config import (
+    SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_STARTTLS,
+    SMTP_POOL_SIZE, SMTP_IDLE_TIMEOUT_SECONDS, SMTP_TIMEOUT_SECONDS
+)
+
+# Errors that mean the session itself is gone (idle timeout, dropped socket). smtplib's
+# reply errors also subclass OSError, so they are told apart in is_connection_error.
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout, socket.error)
+# Server refused this message; the session is still usable after RSET
+MESSAGE_ERRORS = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+
+def is_connection_error(e: Exception) -> bool:
+    if isinstance(e, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(e, smtplib.SMTPResponseException):
+        return e.smtp_code == 421  # "service not available, closing channel"
+    if isinstance(e, smtplib.SMTPException):
+        return False
+    return isinstance(e, CONNECTION_ERRORS)
+
+
+class SMTPConnectionPool:
+    """
+    Keeps up to `size` authenticated SMTP sessions open and sends many messages
+    over each, reconnecting transparently when the server has dropped a session.
+    """
+
+    def __init__(self, host, port, user, password, starttls=True, size=2, idle_timeout=60, timeout=30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {"sent": 0, "failed": 0, "connects": 0, "reconnects": 0, "send_seconds": 0.0}
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        # A local stand-in (e.g. aiosmtpd) usually has neither TLS nor auth
+        if self.starttls:
+            server.starttls()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        self._count("connects")
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    server, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - last_used < self.idle_timeout:
+                    return server
+                # Most servers drop idle sessions anyway; don't wait to find out mid-send
+                self._close(server)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, server):
+        if server is not None:
+            self._idle.put((server, time.monotonic()))
+        self._slots.release()
+
+    def _send_on(self, server, msg):
+        """Send; on a message-level rejection reset the transaction, keeping the session."""
+        try:
+            server.send_message(msg)
+        except MESSAGE_ERRORS as e:
+            if not is_connection_error(e):
+                try:
+                    server.rset()
+                except Exception:
+                    pass
+            raise
+
+    def send(self, msg):
+        server = self._acquire()
+        started = time.perf_counter()
+        try:
+            try:
+                self._send_on(server, msg)
+            except Exception as e:
+                if not is_connection_error(e):
+                    if not isinstance(e, MESSAGE_ERRORS):
+                        # Unknown protocol state: don't hand this session to the next sender
+                        self._close(server)
+                        server = None
+                    raise
+                # Dropped session: reconnect and send once more
+                self._close(server)
+                server = None
+                server = self._connect()
+                self._count("reconnects")
+                self._send_on(server, msg)
+        except Exception as e:
+            if server is not None and is_connection_error(e):
+                self._close(server)
+                server = None
+            self._count("failed")
+            raise
+        finally:
+            self._count("send_seconds", time.perf_counter() - started)
+            self._release(server)
+        self._count("sent")
+
+    def close_all(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["messages_per_second"] = round(stats["sent"] / stats["send_seconds"], 2) if stats["send_seconds"] else 0.0
+        stats["send_seconds"] = round(stats["send_seconds"], 3)
+        stats["idle_connections"] = self._idle.qsize()
+        return stats
+
+
+smtp_pool = SMTPConnectionPool(
+    SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD,
+    starttls=SMTP_STARTTLS,
+    size=SMTP_POOL_SIZE,
+    idle_timeout=SMTP_IDLE_TIMEOUT_SECONDS,
+    timeout=SMTP_TIMEOUT_SECONDS,
+)
+
 
 def send_email(to_email: str, subject: str, message: str):
     msg = MIMEText(message)
@@ -8,7 +161,4 @@ def send_email(to_email: str, subject: str, message: str):
     msg["From"] = SMTP_USER
     msg["To"] = to_email
 
-    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(msg)
+    smtp_pool.send(msg)
@@ -0,0 +1,225 @@
+# app/core/metrics.py
+# In-process metrics rendered in the Prometheus text format. Each worker keeps its
+# own numbers (scrape every worker, or sum them in the query). Updates are a lock
+# and a few dict operations, so they stay on in production.
+import threading
+import time
+from contextvars import ContextVar
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, *labels, value: float):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # per-bucket (non-cumulative) counts, sum, count
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from request start to last response byte", ("method", "route")))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being handled by this worker"))
+rate_limited = registry.register(Counter(
+    "http_requests_rejected_total", "Requests refused before routing (rate limit or load shedding)", ("reason",)))
+
+mongo_latency = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time", ("command", "collection"), MONGO_BUCKETS))
+mongo_documents = registry.register(Counter(
+    "mongodb_command_documents_total", "Documents returned or written by MongoDB commands", ("command", "collection")))
+mongo_failures = registry.register(Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands", ("command", "collection")))
+
+
+# ASGI scope of the request being handled; contextvars follow it into the threadpool
+_request_scope = ContextVar("request_scope", default=None)
+
+
+def route_template(scope) -> str:
+    # Templates ("/student/profile/{roll_no}"), not raw paths, keep label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def current_route():
+    """Route template of the request this code runs for, or None outside a request."""
+    scope = _request_scope.get()
+    return f"{scope['method']} {route_template(scope)}" if scope else None
+
+
+class MetricsMiddleware:
+    """Per-route latency histogram, status counts and an in-flight gauge."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_scope.reset(token)
+            http_in_flight.dec()
+            route = route_template(scope)
+            http_latency.observe(scope["method"], route, value=time.perf_counter() - started)
+            http_requests.inc(scope["method"], route, str(status))
+
+
+def _document_count(command: str, reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+    if command in ("insert", "delete", "update", "count"):
+        return int(reply.get("n", 0))
+    if command == "findAndModify":
+        return 1 if reply.get("value") else 0
+    return 0
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Per command/collection durations and document counts for the app's MongoClient."""
+
+    def __init__(self):
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else "-"
+        if event.command_name == "getMore":
+            collection = event.command.get("collection", "-")
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event):
+        with self._lock:
+            return self._collections.pop((event.connection_id, event.request_id), "-")
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        mongo_latency.observe(event.command_name, collection, value=event.duration_micros / 1e6)
+        count = _document_count(event.command_name, event.reply)
+        if count:
+            mongo_documents.inc(event.command_name, collection, amount=count)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        mongo_latency.observe(event.command_name, collection, value=event.duration_micros / 1e6)
+        mongo_failures.inc(event.command_name, collection)
+
+
+mongo_command_metrics = MongoCommandMetrics()
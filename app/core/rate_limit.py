@@ -0,0 +1,287 @@
+# app/core/rate_limit.py
+# Token-bucket rate limiting and a global in-flight cap, as plain ASGI middleware
+# so rejected requests never reach routing, dependencies or MongoDB.
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from jose import JWTError, jwt
+from pymongo.errors import PyMongoError
+from starlette.concurrency import run_in_threadpool
+from app.core.metrics import rate_limited
+from app.core.config import (
+    SECRET_KEY, ALGORITHM,
+    RATE_LIMIT_ENABLED, RATE_LIMIT_BACKEND, RATE_LIMIT_LOGIN, RATE_LIMIT_ATTENDANCE, RATE_LIMIT_PER_IP,
+    MAX_CONCURRENT_REQUESTS, TRUST_FORWARDED_FOR
+)
+
+logger = logging.getLogger(__name__)
+
+# Identity fields looked up in small JSON bodies when there is no session token
+IDENTITY_FIELDS = ("roll_no", "employee_id", "user_id")
+MAX_INSPECTED_BODY = 16 * 1024
+
+
+def parse_rate(spec: str):
+    """'10/60' -> (capacity 10, refill 10 tokens per 60 s); '' or '0' disables the limit."""
+    if not spec or spec.strip() in ("0", "off"):
+        return None
+    count, _, seconds = spec.partition("/")
+    capacity = float(count)
+    return capacity, capacity / float(seconds or 1)
+
+
+class MemoryBuckets:
+    """Per-process buckets; each worker enforces the limit on its own share of traffic."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        """Take one token; returns 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+            if now - self._last_prune > 60:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now: float):
+        # A bucket idle long enough to be full again carries no state worth keeping
+        self._last_prune = now
+        for key in [k for k, (_, updated) in self._buckets.items() if now - updated > 3600]:
+            del self._buckets[key]
+
+
+class MongoBuckets:
+    """Buckets shared by all workers: one atomic pipeline update per request."""
+
+    def __init__(self):
+        from app.db.database import rate_limits
+        self.collection = rate_limits
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        from pymongo import ReturnDocument
+        now = datetime.utcnow()
+        refilled = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]},
+            {"$multiply": [{"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}, rate]},
+        ]}]}
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": now + timedelta(seconds=capacity / rate + 60),
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return 0.0 if doc["allowed"] else (1 - doc["tokens"]) / rate
+
+
+BACKENDS = {"memory": MemoryBuckets, "mongo": MongoBuckets}
+
+
+class RateLimitRule:
+    def __init__(self, name: str, paths: tuple, spec: str, key_by: str, methods: tuple = ("POST",)):
+        self.name = name
+        self.paths = paths
+        self.limit = parse_rate(spec)
+        self.key_by = key_by  # "ip" or "identity"
+        self.methods = methods
+
+    def matches(self, method: str, path: str) -> bool:
+        return self.limit is not None and method in self.methods and path in self.paths
+
+
+DEFAULT_RULES = [
+    # Keyed by the account being logged into (plus the IP unless a token proves it):
+    # a whole class behind one campus NAT logging in at once must not share a bucket
+    RateLimitRule("login", ("/login/student", "/login/teacher", "/admin/login", "/admin/request-otp", "/admin/verify-otp"), RATE_LIMIT_LOGIN, "identity"),
+    RateLimitRule("attendance", ("/student/markAttendance",), RATE_LIMIT_ATTENDANCE, "identity"),
+]
+
+
+def client_ip(scope) -> str:
+    if TRUST_FORWARDED_FOR:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _token_subject(scope):
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            except JWTError:
+                return None
+            return f"{payload.get('role', 'user')}:{payload.get('sub')}"
+    return None
+
+
+async def _read_body(receive):
+    body, more = b"", True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    return body
+
+
+def _replay(body: bytes, receive):
+    """Hand the already-read body to the app, then pass through (e.g. to see disconnects)."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+def _body_identity(body: bytes):
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    for field in IDENTITY_FIELDS:
+        if data.get(field):
+            return f"{field}:{str(data[field]).strip().upper()}"
+    return None
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """
+    Per-IP and per-identity token buckets (429 + Retry-After) and a cap on requests
+    in flight in this worker (503), checked before the request reaches the app.
+    """
+
+    def __init__(self, app, rules=None, backend: str = None, max_concurrent: int = None, per_ip: str = None):
+        self.app = app
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.per_ip = parse_rate(RATE_LIMIT_PER_IP if per_ip is None else per_ip)
+        self.buckets = BACKENDS[backend or RATE_LIMIT_BACKEND]()
+        self.offload = not isinstance(self.buckets, MemoryBuckets)
+        # Used while a shared backend is unreachable, so an outage degrades to per-worker limits
+        self.fallback = self.buckets if not self.offload else MemoryBuckets()
+        self._last_store_warning = 0.0
+        self.max_concurrent = MAX_CONCURRENT_REQUESTS if max_concurrent is None else max_concurrent
+        self.in_flight = 0
+        self.shed = 0
+        self.limited = 0
+
+    async def _take(self, key: str, limit) -> float:
+        if not self.offload:
+            return self.buckets.take(key, *limit)
+        try:
+            return await run_in_threadpool(self.buckets.take, key, *limit)
+        except PyMongoError as e:
+            # Fail open: a store outage must not turn every limited request into a 500
+            now = time.monotonic()
+            if now - self._last_store_warning > 60:
+                self._last_store_warning = now
+                logger.warning("Rate limit store unavailable, using in-memory buckets: %s", e)
+            return self.fallback.take(key, *limit)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            # Fail fast rather than queue behind work that is already late
+            self.shed += 1
+            rate_limited.inc("shed")
+            return await _reject(send, 503, "Server busy, please retry shortly", 1)
+
+        self.in_flight += 1
+        try:
+            ip = client_ip(scope)
+            if self.per_ip:
+                wait = await self._take(f"ip:{ip}", self.per_ip)
+                if wait:
+                    self.limited += 1
+                    rate_limited.inc("per_ip")
+                    return await _reject(send, 429, "Too many requests", wait)
+
+            method, path = scope["method"], scope["path"]
+            for rule in self.rules:
+                if not rule.matches(method, path):
+                    continue
+                if rule.key_by == "ip":
+                    key = f"{rule.name}:ip:{ip}"
+                else:
+                    subject = _token_subject(scope)
+                    if subject is not None:
+                        # Verified by signature: the account's own bucket
+                        key = f"{rule.name}:{subject}"
+                    else:
+                        body = await _read_body(receive) if _small_json(scope) else b""
+                        receive = _replay(body, receive)
+                        identity = _body_identity(body)
+                        # A body id is only a claim: pair it with the IP, so nobody can drain
+                        # another student's bucket, while a class behind one NAT still gets
+                        # a bucket per account. Anonymous callers share their IP's bucket.
+                        key = f"{rule.name}:{identity}:ip:{ip}" if identity else f"{rule.name}:ip:{ip}"
+                wait = await self._take(key, rule.limit)
+                if wait:
+                    self.limited += 1
+                    rate_limited.inc(rule.name)
+                    return await _reject(send, 429, "Too many requests", wait)
+
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "shed": self.shed, "limited": self.limited}
+
+
+def _small_json(scope) -> bool:
+    headers = dict(scope.get("headers", []))
+    if b"application/json" not in headers.get(b"content-type", b""):
+        return False
+    try:
+        return int(headers.get(b"content-length", b"")) <= MAX_INSPECTED_BODY
+    except ValueError:
+        return False
@@ -0,0 +1,40 @@
+# app/core/responses.py
+from decimal import Decimal
+
+import orjson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from fastapi.responses import JSONResponse
+
+# datetimes/dates come out in the same ISO 8601 form jsonable_encoder produces
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    """JSON bytes for API payloads, with ObjectId/Decimal128 handled natively."""
+    return orjson.dumps(value, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson-backed JSONResponse; the app's default response class. Returning it
+    directly from a route (FastJSONResponse(docs)) also skips jsonable_encoder,
+    which is where most of the time goes for large lists of Mongo documents.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,67 @@
+# app/core/security.py
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, SESSION_TOKEN_EXPIRE_MINUTES
+
+# Claims copied from the user document into a session token, so handlers can use
+# them like the document itself (student["branch"], ...) without reading it again
+SESSION_CLAIMS = {
+    "student": ("roll_no", "full_name", "branch", "section", "semester"),
+    "teacher": ("employee_id", "full_name"),
+}
+ID_FIELDS = {"student": "roll_no", "teacher": "employee_id"}
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def create_access_token(data: dict, expires_delta: timedelta = None):
+    to_encode = data.copy()
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=int(ACCESS_TOKEN_EXPIRE_MINUTES or 30)))
+    to_encode.update({"exp": expire})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def create_session_token(role: str, user: dict) -> str:
+    claims = {field: user.get(field) for field in SESSION_CLAIMS[role]}
+    claims.update({"sub": str(user[ID_FIELDS[role]]), "role": role})
+    return create_access_token(claims, timedelta(minutes=SESSION_TOKEN_EXPIRE_MINUTES))
+
+
+def _session_dependency(role: str):
+    def dependency(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> Optional[dict]:
+        """
+        Verified token claims, or None when the request carries no bearer token
+        (older clients that only send the id). Verification is signature + expiry
+        only; no database read.
+        """
+        if credentials is None:
+            return None
+        try:
+            payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid or expired session token")
+        if payload.get("role") != role:
+            raise HTTPException(status_code=403, detail=f"Not a {role} session")
+        return payload
+
+    return dependency
+
+
+student_session = _session_dependency("student")
+teacher_session = _session_dependency("teacher")
+
+
+def session_user(session: Optional[dict], user_id: str, lookup):
+    """
+    The user a request acts as: the token claims when a session token is present
+    (rejecting tokens issued for someone else), otherwise lookup() from the database.
+    """
+    if session is None:
+        return lookup()
+    if str(session.get("sub", "")).upper() != str(user_id).upper():
+        raise HTTPException(status_code=403, detail="Session token does not match this user")
+    return session
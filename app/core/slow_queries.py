@@ -0,0 +1,212 @@
+# app/core/slow_queries.py
+# Records read/write commands slower than SLOW_QUERY_MS to the capped slow_queries
+# collection, with the calling route and the queryPlanner output of explain().
+# Explains run on one background thread, so the slow request itself pays nothing.
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bson import json_util
+from bson.regex import Regex
+from pymongo import monitoring
+from app.core.config import SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN
+from app.core.metrics import current_route
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+# Fields kept when re-sending a command as explain (session/cluster fields are rejected there)
+EXPLAINABLE = {
+    "find": ("find", "filter", "sort", "projection", "hint", "skip", "limit", "collation"),
+    "aggregate": ("aggregate", "pipeline", "cursor", "hint", "collation"),
+    "count": ("count", "query", "hint", "collation"),
+    "distinct": ("distinct", "key", "query", "collation"),
+    "findAndModify": ("findAndModify", "query", "sort", "update", "remove", "new", "upsert", "fields"),
+    "update": ("update", "updates"),
+    "delete": ("delete", "deletes"),
+}
+# The same query shape is explained at most this often
+EXPLAIN_INTERVAL_SECONDS = 60
+MAX_PENDING_EXPLAINS = 100
+
+
+def command_filter(command_name: str, command: dict):
+    if command_name == "find":
+        return command.get("filter", {})
+    if command_name in ("count", "distinct", "findAndModify"):
+        return command.get("query", {})
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        return pipeline[0].get("$match", {})
+    if command_name == "update":
+        return (command.get("updates") or [{}])[0].get("q", {})
+    if command_name == "delete":
+        return (command.get("deletes") or [{}])[0].get("q", {})
+    return {}
+
+
+def query_shape(value):
+    """Filter with the values blanked out: {"roll_no": {"$regex": "?"}}."""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(v) for v in value[:1]]
+    return "?"
+
+
+def regex_flags(value) -> set:
+    """Regex operators that can't use an index as a tight range (unanchored or case-insensitive)."""
+    flags = set()
+    if isinstance(value, dict):
+        if "$regex" in value:
+            pattern = value["$regex"]
+            options = value.get("$options", "")
+            if isinstance(pattern, (Regex, re.Pattern)):
+                flags |= regex_flags(pattern)
+            else:
+                flags.add("REGEX")
+                if not str(pattern).startswith("^"):
+                    flags.add("REGEX_UNANCHORED")
+                if "i" in options:
+                    flags.add("REGEX_CASE_INSENSITIVE")
+        for v in value.values():
+            flags |= regex_flags(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            flags |= regex_flags(v)
+    elif isinstance(value, (Regex, re.Pattern)):
+        flags.add("REGEX")
+        pattern = value.pattern
+        if not str(pattern).startswith("^"):
+            flags.add("REGEX_UNANCHORED")
+        options = value.flags
+        case_insensitive = "i" in options if isinstance(options, str) else bool(options & re.IGNORECASE)
+        if case_insensitive:
+            flags.add("REGEX_CASE_INSENSITIVE")
+    return flags
+
+
+def plan_stages(plan) -> list:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for v in plan.values():
+            stages.extend(plan_stages(v))
+    elif isinstance(plan, list):
+        for v in plan:
+            stages.extend(plan_stages(v))
+    return stages
+
+
+def _winning_plan(explain: dict):
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # aggregate explains nest the planner inside the first ($cursor) stage
+        for stage in explain.get("stages", []):
+            planner = stage.get("$cursor", {}).get("queryPlanner")
+            if planner:
+                break
+    return (planner or {}).get("winningPlan")
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, explain: bool = SLOW_QUERY_EXPLAIN):
+        self.threshold_micros = threshold_ms * 1000
+        self.explain = explain
+        self._commands = {}
+        self._last_explained = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    def started(self, event):
+        if event.command_name not in EXPLAINABLE:
+            return
+        if event.command.get(event.command_name) == SLOW_QUERY_COLLECTION:
+            return
+        with self._lock:
+            self._commands[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def _pop(self, event):
+        with self._lock:
+            return self._commands.pop((event.connection_id, event.request_id), None)
+
+    def failed(self, event):
+        self._pop(event)
+
+    def succeeded(self, event):
+        entry = self._pop(event)
+        if entry is None or event.duration_micros < self.threshold_micros:
+            return
+        database_name, command = entry
+        # Route comes from the request context; background work is named by its thread
+        route = current_route() or f"thread:{threading.current_thread().name}"
+        with self._lock:
+            if self._pending >= MAX_PENDING_EXPLAINS:
+                return
+            self._pending += 1
+        self._executor.submit(self._record, database_name, event.command_name, command, event.duration_micros / 1000, route)
+
+    def _record(self, database_name: str, command_name: str, command: dict, duration_ms: float, route: str):
+        try:
+            from app.db.database import client
+            db = client[database_name]
+            filter = command_filter(command_name, command)
+            shape = json_util.dumps(query_shape(filter), sort_keys=True)
+            flags = regex_flags(filter)
+            doc = {
+                "at": datetime.utcnow(),
+                "collection": command.get(command_name),
+                "command": command_name,
+                "duration_ms": round(duration_ms, 1),
+                "route": route,
+                "filter": json_util.dumps(filter),
+                "shape": shape,
+            }
+
+            key = (database_name, doc["collection"], command_name, shape)
+            now = time.monotonic()
+            if self.explain and now - self._last_explained.get(key, 0) >= EXPLAIN_INTERVAL_SECONDS:
+                self._last_explained[key] = now
+                explain = db.command({"explain": self._explainable(command_name, command), "verbosity": "queryPlanner"})
+                winning = _winning_plan(explain)
+                stages = plan_stages(winning)
+                doc["plan_stages"] = stages
+                doc["winning_plan"] = json_util.dumps(winning)
+                if "COLLSCAN" in stages:
+                    flags.add("COLLSCAN")
+
+            doc["flags"] = sorted(flags)
+            db[SLOW_QUERY_COLLECTION].insert_one(doc)
+        except Exception:
+            logger.exception("Could not record slow %s on %s", command_name, command.get(command_name))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @staticmethod
+    def _explainable(command_name: str, command: dict) -> dict:
+        explainable = {k: command[k] for k in EXPLAINABLE[command_name] if k in command}
+        # explain takes a single write statement
+        for field in ("updates", "deletes"):
+            if field in explainable:
+                explainable[field] = explainable[field][:1]
+        return explainable
+
+
+slow_query_listener = SlowQueryListener()
+
+
+def ensure_slow_query_log(db, size_bytes: int):
+    """Create the capped collection once; oldest entries are overwritten when it is full."""
+    from pymongo.errors import CollectionInvalid
+    if SLOW_QUERY_COLLECTION in db.list_collection_names(filter={"name": SLOW_QUERY_COLLECTION}):
+        return
+    try:
+        db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=size_bytes)
+    except CollectionInvalid:
+        pass  # another worker created it first
@@ -0,0 +1,70 @@
+# app/core/subject_catalog.py
+import hashlib
+import json
+
+from app.core.config import SUBJECTS
+
+
+class SubjectCatalog:
+    """
+    SUBJECTS compiled once at import: per-semester tuples and frozensets (original
+    and lowercase), lowercase -> canonical name maps, a reverse index from subject
+    to the (course, branch, semester) slots that teach it, and the /subjects
+    response body pre-serialized with its ETag.
+    """
+
+    def __init__(self, subjects: dict):
+        self.tree = subjects
+        self._names = {}
+        self._lower = {}
+        self._name_sets = {}
+        self._lower_sets = {}
+        self._canonical = {}
+        locations = {}
+
+        for course, branches in subjects.items():
+            for branch, semesters in branches.items():
+                for semester, names in semesters.items():
+                    key = (course, branch, str(semester))
+                    lower = tuple(name.lower() for name in names)
+                    self._names[key] = tuple(names)
+                    self._lower[key] = lower
+                    self._name_sets[key] = frozenset(names)
+                    self._lower_sets[key] = frozenset(lower)
+                    self._canonical[key] = dict(zip(lower, names))
+                    for name in lower:
+                        locations.setdefault(name, set()).add(key)
+
+        self._locations = {name: frozenset(keys) for name, keys in locations.items()}
+        self.all_subjects = frozenset(self._locations)
+
+        self.json_bytes = json.dumps(subjects, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.json_bytes).hexdigest()[:16] + '"'
+
+    def semester_subjects(self, course: str, branch: str, semester):
+        """Subject names in curriculum order, or None for an unknown course/branch/semester."""
+        return self._names.get((course, branch, str(semester)))
+
+    def lower_subjects(self, course: str, branch: str, semester):
+        return self._lower.get((course, branch, str(semester)))
+
+    def lower_subject_set(self, course: str, branch: str, semester) -> frozenset:
+        return self._lower_sets.get((course, branch, str(semester)), frozenset())
+
+    def has_subject(self, course: str, branch: str, semester, subject: str) -> bool:
+        """Exact-name membership, as the OTP form submits the name from /subjects."""
+        return subject in self._name_sets.get((course, branch, str(semester)), ())
+
+    def canonical(self, course: str, branch: str, semester, subject: str):
+        """Curriculum spelling of a case-insensitive subject name, or None."""
+        return self._canonical.get((course, branch, str(semester)), {}).get(subject.strip().lower())
+
+    def is_known(self, subject: str) -> bool:
+        return subject.strip().lower() in self.all_subjects
+
+    def locate(self, subject: str) -> frozenset:
+        """(course, branch, semester) slots teaching this subject, case-insensitive."""
+        return self._locations.get(subject.strip().lower(), frozenset())
+
+
+subject_catalog = SubjectCatalog(SUBJECTS)
@@ -0,0 +1,119 @@
+# app/core/ttl_store.py
+# Expiring key-value store for short-lived state (login OTPs, ...). The memory
+# backend only works with a single worker; "mongo" and "redis" are shared, so
+# any worker behind the load balancer sees what another one stored.
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.core.config import TTL_STORE_BACKEND, REDIS_URL
+
+
+class MemoryTTLStore:
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def set(self, key: str, value: dict, ttl_seconds: float):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl_seconds)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._data[key]
+                return None
+            return entry[0]
+
+    def pop(self, key: str):
+        """Remove and return the value; of several concurrent callers only one gets it."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class MongoTTLStore:
+    """Backed by the ttl_store collection; its TTL index purges expired documents."""
+
+    def __init__(self, namespace: str):
+        from app.db.database import ttl_store
+        self.namespace = namespace
+        self.collection = ttl_store
+
+    def _id(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def set(self, key: str, value: dict, ttl_seconds: float):
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        self.collection.replace_one(
+            {"_id": self._id(key)},
+            {"value": value, "expires_at": expires_at},
+            upsert=True,
+        )
+
+    def get(self, key: str):
+        # The TTL monitor runs about once a minute, so expiry is also checked here
+        doc = self.collection.find_one({"_id": self._id(key), "expires_at": {"$gt": datetime.utcnow()}})
+        return doc["value"] if doc else None
+
+    def pop(self, key: str):
+        doc = self.collection.find_one_and_delete({"_id": self._id(key), "expires_at": {"$gt": datetime.utcnow()}})
+        return doc["value"] if doc else None
+
+    def delete(self, key: str):
+        self.collection.delete_one({"_id": self._id(key)})
+
+
+class RedisTTLStore:
+    """Any Redis-protocol server (Redis, Valkey, a local stand-in); needs the redis package."""
+
+    def __init__(self, namespace: str, url: str = None):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("TTL_STORE_BACKEND=redis needs the 'redis' package installed")
+        self.namespace = namespace
+        self.client = redis.Redis.from_url(url or REDIS_URL)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def set(self, key: str, value: dict, ttl_seconds: float):
+        self.client.set(self._key(key), json.dumps(value), px=max(1, int(ttl_seconds * 1000)))
+
+    def get(self, key: str):
+        raw = self.client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    def pop(self, key: str):
+        # GET + DEL in one MULTI so two workers can't both consume the value
+        pipe = self.client.pipeline(transaction=True)
+        pipe.get(self._key(key))
+        pipe.delete(self._key(key))
+        raw, _ = pipe.execute()
+        return json.loads(raw) if raw is not None else None
+
+    def delete(self, key: str):
+        self.client.delete(self._key(key))
+
+
+BACKENDS = {"memory": MemoryTTLStore, "mongo": MongoTTLStore, "redis": RedisTTLStore}
+
+
+def ttl_store(namespace: str, backend: str = None):
+    """Store for one kind of short-lived state; keys are kept apart per namespace."""
+    backend = backend or TTL_STORE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown TTL_STORE_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[backend](namespace)
@@ -1,19 +1,80 @@
 from pymongo import MongoClient
-from app.core.config import MONGO_URI
+from app.core.config import (
+    MONGO_URI, MONGO_DB_NAME, USER_STORE,
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_COMPRESSORS, METRICS_ENABLED, SLOW_QUERY_MS
+)
+from app.core.metrics import mongo_command_metrics
+from app.core.slow_queries import slow_query_listener
+from app.db.status_view import StatusView
 
-client = MongoClient(MONGO_URI)
-db = client["uietattendance"]
+
+def create_client(uri: str = MONGO_URI) -> MongoClient:
+    """
+    The app's one MongoClient (one pool and one topology monitor per worker).
+    connect=False defers DNS/SRV lookup and the first connection to the first
+    operation, so importing the app does no network I/O and forked workers each
+    connect on their own.
+    """
+    options = {
+        "connect": False,
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS or None,
+        "appname": "uietattendance",
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    listeners = []
+    if METRICS_ENABLED:
+        listeners.append(mongo_command_metrics)
+    if SLOW_QUERY_MS > 0:
+        listeners.append(slow_query_listener)
+    if listeners:
+        options["event_listeners"] = listeners
+    return MongoClient(uri, **options)
+
+
+client = create_client()
+db = client[MONGO_DB_NAME]
 
 # collections
-pending_students = db["pending_students"]
-approved_students = db["approved_students"]
-rejected_students = db["rejected_students"]
+# USER_STORE=unified keeps one collection per role with a status field; the
+# pending_/approved_/rejected_ names below are then status-scoped views of it.
+students = db["students"]
+teachers = db["teachers"]
+
+if USER_STORE == "unified":
+    pending_students = StatusView(students, "pending")
+    approved_students = StatusView(students, "approved")
+    rejected_students = StatusView(students, "rejected")
+
+    pending_teachers = StatusView(teachers, "pending")
+    approved_teachers = StatusView(teachers, "approved")
+    rejected_teachers = StatusView(teachers, "rejected")
+else:
+    pending_students = db["pending_students"]
+    approved_students = db["approved_students"]
+    rejected_students = db["rejected_students"]
 
-pending_teachers = db["pending_teachers"]
-approved_teachers = db["approved_teachers"]
-rejected_teachers = db["rejected_teachers"]
+    pending_teachers = db["pending_teachers"]
+    approved_teachers = db["approved_teachers"]
+    rejected_teachers = db["rejected_teachers"]
 
 notifications = db["notifications"]
+attachments = db["attachments"]
+admin_notifications = db["adminnotifications"]
+notification_inbox = db["notification_inbox"]
+bulk_jobs = db["bulk_jobs"]
+bulk_job_results = db["bulk_job_results"]
+email_outbox = db["email_outbox"]
+identities = db["identities"]
+ttl_store = db["ttl_store"]
+rate_limits = db["rate_limits"]
 
 
 otps = db["otps"]
@@ -0,0 +1,57 @@
+# app/db/indexes.py
+from pymongo import ASCENDING, DESCENDING
+from app.core.config import USER_STORE, SLOW_QUERY_MS, SLOW_QUERY_LOG_BYTES, EMAIL_SENT_RETENTION_SECONDS
+from app.core.slow_queries import ensure_slow_query_log
+from app.db.database import (
+    db, students, teachers, notification_inbox, bulk_jobs, bulk_job_results, email_outbox, identities, ttl_store, rate_limits,
+    pending_students, approved_students, rejected_students,
+    pending_teachers, approved_teachers, rejected_teachers
+)
+
+
+def ensure_indexes():
+    # create_index is a no-op when the index already exists, so this is safe on every startup
+    notification_inbox.create_index([("audience", ASCENDING), ("sort_key", DESCENDING)])
+    notification_inbox.create_index("notification_id")
+    notification_inbox.create_index("expires_at", expireAfterSeconds=0)
+
+    # login/profile lookups, admin lists and search: name/id prefix and class filters
+    if USER_STORE == "unified":
+        # status leads every index so each status slice is its own index range
+        students.create_index([("status", ASCENDING), ("_id", ASCENDING)])
+        students.create_index([("status", ASCENDING), ("roll_no", ASCENDING)])
+        students.create_index([("status", ASCENDING), ("name_keys", ASCENDING)])
+        students.create_index([("status", ASCENDING), ("branch", ASCENDING), ("semester", ASCENDING), ("section", ASCENDING), ("name_keys", ASCENDING)])
+        students.create_index("status_change_id", sparse=True)
+        teachers.create_index([("status", ASCENDING), ("_id", ASCENDING)])
+        teachers.create_index([("status", ASCENDING), ("employee_id", ASCENDING)])
+        teachers.create_index([("status", ASCENDING), ("name_keys", ASCENDING)])
+        teachers.create_index("status_change_id", sparse=True)
+    else:
+        for collection in (pending_students, approved_students, rejected_students):
+            collection.create_index("name_keys")
+            collection.create_index("roll_no")
+            collection.create_index([("branch", ASCENDING), ("semester", ASCENDING), ("section", ASCENDING), ("name_keys", ASCENDING)])
+        for collection in (pending_teachers, approved_teachers, rejected_teachers):
+            collection.create_index("name_keys")
+            collection.create_index("employee_id")
+
+    # identity registry: the unique index is what makes a registration claim atomic
+    identities.create_index([("role", ASCENDING), ("kind", ASCENDING), ("value", ASCENDING)], unique=True)
+    identities.create_index([("role", ASCENDING), ("owner", ASCENDING)])
+    identities.create_index("unconfirmed_since", sparse=True)
+
+    bulk_jobs.create_index([("status", ASCENDING), ("lease_until", ASCENDING)])
+    bulk_job_results.create_index([("job_id", ASCENDING), ("line", ASCENDING)])
+
+    email_outbox.create_index([("status", ASCENDING), ("next_attempt_at", ASCENDING)])
+    # Queued/dead entries have sent_at None, which a TTL index never expires
+    email_outbox.create_index("sent_at", expireAfterSeconds=EMAIL_SENT_RETENTION_SECONDS)
+
+    ttl_store.create_index("expires_at", expireAfterSeconds=0)
+    rate_limits.create_index("expires_at", expireAfterSeconds=0)
+
+    if SLOW_QUERY_MS > 0:
+        ensure_slow_query_log(db, SLOW_QUERY_LOG_BYTES)
+
+    db["photos.files"].create_index([("metadata.variant_of", ASCENDING), ("metadata.size", ASCENDING)])
@@ -0,0 +1,57 @@
+# app/db/status_view.py
+class StatusView:
+    """
+    One status slice ("pending", "approved", "rejected") of a per-role user collection,
+    shaped like a plain pymongo Collection: every filter is scoped to the status and
+    every inserted document is stamped with it. Lets existing call sites keep using
+    approved_students & co. when USER_STORE=unified.
+    """
+
+    def __init__(self, collection, status: str):
+        self.collection = collection
+        self.status = status
+
+    @property
+    def name(self) -> str:
+        return f"{self.collection.name}[{self.status}]"
+
+    def _scoped(self, filter=None) -> dict:
+        return {**(filter or {}), "status": self.status}
+
+    def find(self, filter=None, *args, **kwargs):
+        return self.collection.find(self._scoped(filter), *args, **kwargs)
+
+    def find_one(self, filter=None, *args, **kwargs):
+        return self.collection.find_one(self._scoped(filter), *args, **kwargs)
+
+    def count_documents(self, filter=None, **kwargs):
+        return self.collection.count_documents(self._scoped(filter), **kwargs)
+
+    def insert_one(self, document, **kwargs):
+        document["status"] = self.status
+        return self.collection.insert_one(document, **kwargs)
+
+    def insert_many(self, documents, **kwargs):
+        documents = list(documents)
+        for document in documents:
+            document["status"] = self.status
+        return self.collection.insert_many(documents, **kwargs)
+
+    def update_one(self, filter, update, **kwargs):
+        return self.collection.update_one(self._scoped(filter), update, **kwargs)
+
+    def update_many(self, filter, update, **kwargs):
+        return self.collection.update_many(self._scoped(filter), update, **kwargs)
+
+    def find_one_and_update(self, filter, update, **kwargs):
+        return self.collection.find_one_and_update(self._scoped(filter), update, **kwargs)
+
+    def delete_one(self, filter, **kwargs):
+        return self.collection.delete_one(self._scoped(filter), **kwargs)
+
+    def delete_many(self, filter, **kwargs):
+        return self.collection.delete_many(self._scoped(filter), **kwargs)
+
+    def bulk_write(self, requests, **kwargs):
+        # Callers address documents by _id they read through this view, so no extra scoping
+        return self.collection.bulk_write(requests, **kwargs)
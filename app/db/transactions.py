@@ -0,0 +1,46 @@
+# app/db/transactions.py
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.db.database import client
+
+_supports_transactions = None
+
+
+def supports_transactions() -> bool:
+    """Transactions need a replica set or sharded cluster; a standalone dev server has neither."""
+    global _supports_transactions
+    if _supports_transactions is None:
+        try:
+            hello = client.admin.command("hello")
+            _supports_transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except PyMongoError:
+            return False
+    return _supports_transactions
+
+
+def run_in_transaction(fn):
+    """Call fn(session) inside a transaction when the deployment allows it, else fn(None)."""
+    if not supports_transactions():
+        return fn(None)
+    with client.start_session() as session:
+        return session.with_transaction(fn)
+
+
+def move_documents(source, target, query: dict, session=None) -> list:
+    """
+    Move matching documents from source to target (keeping _id) with one insert_many
+    and one delete_many. Without a session, documents already present in target from
+    an earlier interrupted move are tolerated, so the move can simply be retried.
+    Inside a transaction a duplicate key aborts it, so the error is re-raised.
+    """
+    docs = list(source.find(query, session=session))
+    if not docs:
+        return []
+    try:
+        target.insert_many(docs, ordered=False, session=session)
+    except BulkWriteError as e:
+        if session is not None:
+            raise
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    source.delete_many({"_id": {"$in": [d["_id"] for d in docs]}}, session=session)
+    return docs
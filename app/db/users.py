@@ -0,0 +1,84 @@
+# app/db/users.py
+# Status changes (approve/reject) for either USER_STORE layout.
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ReplaceOne, ReturnDocument
+from app.core.config import USER_STORE
+from app.db.database import (
+    db, students, teachers,
+    pending_students, approved_students, rejected_students,
+    pending_teachers, approved_teachers, rejected_teachers
+)
+from app.db.transactions import move_documents
+
+UNIFIED = USER_STORE == "unified"
+
+ROLE_COLLECTIONS = {"student": students, "teacher": teachers}
+STATUS_COLLECTIONS = {
+    "student": {"pending": pending_students, "approved": approved_students, "rejected": rejected_students},
+    "teacher": {"pending": pending_teachers, "approved": approved_teachers, "rejected": rejected_teachers},
+}
+# Later statuses win when the same user sits in several legacy collections
+MERGE_ORDER = ("pending", "rejected", "approved")
+MERGE_BATCH_SIZE = 1000
+
+
+def decide_one(role: str, query: dict, status: str, session=None):
+    """
+    Move one pending user to `status`; returns the user document, or None if not pending.
+    Unified: a single atomic update. Split: delete + insert, so run it in run_in_transaction.
+    """
+    if UNIFIED:
+        return ROLE_COLLECTIONS[role].find_one_and_update(
+            {**query, "status": "pending"},
+            {"$set": {"status": status, "status_changed_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+
+    source = STATUS_COLLECTIONS[role]["pending"]
+    doc = source.find_one(query, session=session)
+    if not doc:
+        return None
+    moved = move_documents(source, STATUS_COLLECTIONS[role][status], {"_id": doc["_id"]}, session=session)
+    return moved[0] if moved else None
+
+
+def decide_many(role: str, query: dict, status: str, session=None) -> list:
+    """Move every pending user matching `query` to `status`; returns the moved documents."""
+    if UNIFIED:
+        # Tag the update so exactly the documents this call changed can be read back
+        change_id = ObjectId()
+        ROLE_COLLECTIONS[role].update_many(
+            {**query, "status": "pending"},
+            {"$set": {"status": status, "status_changed_at": datetime.utcnow(), "status_change_id": change_id}},
+            session=session,
+        )
+        return list(ROLE_COLLECTIONS[role].find({"status_change_id": change_id}, session=session))
+
+    return move_documents(STATUS_COLLECTIONS[role]["pending"], STATUS_COLLECTIONS[role][status], query, session=session)
+
+
+def merge_user_collections() -> dict:
+    """
+    Copy the pending_/approved_/rejected_ collections into the per-role collections with
+    a status field. Documents keep their _id, so the merge can be re-run safely; the
+    legacy collections are left in place until USER_STORE=unified has been verified.
+    """
+    counts = {}
+    for role, target in ROLE_COLLECTIONS.items():
+        for status in MERGE_ORDER:
+            source = db[f"{status}_{role}s"]
+            ops, merged = [], 0
+            for doc in source.find():
+                ops.append(ReplaceOne({"_id": doc["_id"]}, {**doc, "status": status}, upsert=True))
+                if len(ops) == MERGE_BATCH_SIZE:
+                    target.bulk_write(ops, ordered=False)
+                    merged += len(ops)
+                    ops = []
+            if ops:
+                target.bulk_write(ops, ordered=False)
+                merged += len(ops)
+            counts[f"{status}_{role}s"] = merged
+    return counts
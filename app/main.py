@@ -4,28 +4,50 @@ from fastapi.staticfiles import StaticFiles
 import os
 
 from .api import admin, register, auth
-from app.api import teacher, student, subjects, classes, admin_notifications, student_notification, attendance_analysis, bulk_register
-from app.core.config import URL
+from app.api import teacher, student, subjects, classes, admin_notifications, student_notification, attendance_analysis, bulk_register, files, photos, admin_search, metrics
+from app.core.config import URL, METRICS_ENABLED, COMPRESSION_ENABLED
+from app.db.indexes import ensure_indexes
+from app.utils.identity_registry import ensure_identities_backfilled
+from app.utils.notification_inbox import ensure_inbox_built
+from app.utils.bulk_jobs import start_job_runner, stop_job_runner
+from app.core.email_outbox import start_outbox_workers, stop_outbox_workers
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.responses import FastJSONResponse
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Ensure upload directory exists
 os.makedirs("uploads/notifications", exist_ok=True)
 
-# Serve uploaded files
+# Serve legacy uploaded files (new attachments go through the content-addressed store)
 app.mount("/files/notifications", StaticFiles(directory="uploads/notifications"), name="notifications")
 
+# Inside CORS so 429/503 responses still carry CORS headers the browser can read
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+if COMPRESSION_ENABLED:
+    # Outside CORS so the headers it adds are final; inside metrics so timing includes compression
+    app.add_middleware(CompressionMiddleware)
+
+if METRICS_ENABLED:
+    # Outermost, so latency includes every other middleware and rejected requests are counted
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(register.router)
 app.include_router(auth.router)
 app.include_router(admin.router)
+app.include_router(admin_search.router)
 app.include_router(admin_notifications.router)
 app.include_router(teacher.router)
 app.include_router(student.router)
@@ -34,6 +56,23 @@ app.include_router(subjects.router)
 app.include_router(classes.router)
 app.include_router(attendance_analysis.router)
 app.include_router(bulk_register.router)
+app.include_router(files.router)
+app.include_router(photos.router)
+if METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+@app.on_event("startup")
+def on_startup():
+    ensure_indexes()
+    ensure_identities_backfilled()
+    ensure_inbox_built()
+    start_job_runner()
+    start_outbox_workers()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_job_runner()
+    stop_outbox_workers()
 
 @app.get("/")
 def root():
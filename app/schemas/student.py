@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, field_validator
 from datetime import date
-import re
 from enum import Enum
+from app.schemas.validators import is_valid_id, clean_phone, is_valid_phone, ROLL_NO_ERROR, PHONE_ERROR
 
 class Course(str, Enum):
     BE = "BE"
@@ -24,18 +24,14 @@ class StudentRegister(BaseModel):
     @field_validator("roll_no")
     @classmethod
     def validate_roll_no(cls, v: str) -> str:
-        if not v.isdigit() or len(v) != 6:
-            raise ValueError("Roll number must be exactly 6 digits.")
+        if not is_valid_id(v):
+            raise ValueError(ROLL_NO_ERROR)
         return v
 
     @field_validator("phone")
     @classmethod
     def validate_phone(cls, v: str) -> str:
-        cleaned = re.sub(r"[+\-\s]", "", v)
-        if cleaned.startswith("91"):
-            cleaned = cleaned[2:]
-        elif cleaned.startswith("0"):
-            cleaned = cleaned[1:]
-        if not re.fullmatch(r"\d{10}", cleaned):
-            raise ValueError("Phone number must contain exactly 10 digits after removing prefix.")
+        cleaned = clean_phone(v)
+        if not is_valid_phone(cleaned):
+            raise ValueError(PHONE_ERROR)
         return cleaned
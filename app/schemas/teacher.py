@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, field_validator
 from datetime import date
-import re
+from app.schemas.validators import is_valid_id, clean_phone, is_valid_phone, EMPLOYEE_ID_ERROR, PHONE_ERROR
 
 class TeacherRegister(BaseModel):
     full_name: str
@@ -16,25 +16,19 @@ class TeacherRegister(BaseModel):
     @field_validator("employee_id")
     @classmethod
     def validate_employee_id(cls, v: str) -> str:
-        if not v.isdigit() or len(v) != 6:
-            raise ValueError("Employee Id must be exactly 6 digits.")
+        if not is_valid_id(v):
+            raise ValueError(EMPLOYEE_ID_ERROR)
         return v
 
 
     @field_validator('phone')
     @classmethod   
     def validate_phone(cls, v: str) -> str:
-        # Remove +, -, and spaces
-        cleaned = re.sub(r'[+\-\s]', '', v)
-
-        # Remove leading '91' or '0'
-        if cleaned.startswith('91'):
-            cleaned = cleaned[2:]
-        elif cleaned.startswith('0'):
-            cleaned = cleaned[1:]
+        # Remove +, -, and spaces, then a leading '91' or '0'
+        cleaned = clean_phone(v)
 
         # Must be exactly 10 digits now
-        if not re.fullmatch(r'\d{10}', cleaned):
-            raise ValueError('Phone number must contain exactly 10 digits after removing prefix')
+        if not is_valid_phone(cleaned):
+            raise ValueError(PHONE_ERROR)
 
         return cleaned
@@ -0,0 +1,28 @@
+# app/schemas/validators.py
+# Shared by the Pydantic schemas and the vectorized bulk-import validation,
+# so both paths accept and normalize exactly the same values.
+import re
+
+ID_PATTERN = r"\d{6}"
+PHONE_STRIP_PATTERN = r"[+\-\s]"
+# Same as: strip a leading "91", otherwise a leading "0"
+PHONE_PREFIX_PATTERN = r"^(?:91|0)"
+PHONE_PATTERN = r"\d{10}"
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[^@\s.]+"
+
+ROLL_NO_ERROR = "Roll number must be exactly 6 digits."
+EMPLOYEE_ID_ERROR = "Employee Id must be exactly 6 digits."
+PHONE_ERROR = "Phone number must contain exactly 10 digits after removing prefix."
+
+
+def is_valid_id(v: str) -> bool:
+    return re.fullmatch(ID_PATTERN, v) is not None
+
+
+def clean_phone(v: str) -> str:
+    cleaned = re.sub(PHONE_STRIP_PATTERN, "", v)
+    return re.sub(PHONE_PREFIX_PATTERN, "", cleaned, count=1)
+
+
+def is_valid_phone(cleaned: str) -> bool:
+    return re.fullmatch(PHONE_PATTERN, cleaned) is not None
@@ -0,0 +1,176 @@
+# app/utils/attachment_store.py
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime
+from urllib.parse import quote
+
+from app.db.database import attachments
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz variants are produced
+    brotli = None
+
+
+ATTACHMENT_DIR = "uploads/attachments"
+ATTACHMENT_URL_PREFIX = "/files/attachments/"
+CHUNK_SIZE = 64 * 1024
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Only these get precompressed siblings; images, pdf, docx/xlsx (zip) are already compressed
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "application/rtf",
+    "application/msword",
+    "application/vnd.ms-excel",
+    "image/svg+xml",
+}
+
+os.makedirs(ATTACHMENT_DIR, exist_ok=True)
+
+
+def blob_path(digest: str) -> str:
+    return os.path.join(ATTACHMENT_DIR, digest[:2], digest)
+
+
+def attachment_url(digest: str, filename: str) -> str:
+    return f"{ATTACHMENT_URL_PREFIX}{digest}/{quote(filename or 'file')}"
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+class _VariantWriter:
+    """Streams .gz (and .br when available) temp files alongside the upload as it is read."""
+
+    def __init__(self, tmp_path: str):
+        self.paths = {".gz": tmp_path + ".gz"}
+        self._gz_file = open(self.paths[".gz"], "wb")
+        self._gz = gzip.GzipFile(fileobj=self._gz_file, mode="wb", compresslevel=9, mtime=0)
+        self._br = self._br_file = None
+        if brotli is not None:
+            self.paths[".br"] = tmp_path + ".br"
+            self._br_file = open(self.paths[".br"], "wb")
+            self._br = brotli.Compressor(quality=11)
+
+    def write(self, chunk: bytes):
+        self._gz.write(chunk)
+        if self._br is not None:
+            self._br_file.write(self._br.process(chunk))
+
+    def close(self):
+        self._gz.close()
+        self._gz_file.close()
+        if self._br is not None:
+            self._br_file.write(self._br.finish())
+            self._br_file.close()
+
+    def worthwhile(self, size: int) -> dict:
+        """ext -> temp path for variants that save at least 10%; the rest are deleted."""
+        kept = {}
+        for ext, path in self.paths.items():
+            if os.path.getsize(path) < size * 0.9:
+                kept[ext] = path
+            else:
+                os.remove(path)
+        return kept
+
+
+def _publish(src: str, dest: str):
+    # Hard link (same filesystem, no copy) so src stays available; atomic rename into place
+    tmp = dest + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def _place(tmp_path: str, variants: dict, final_path: str):
+    """Publish the blob (and variants) under the content-addressed path; the blob goes last."""
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    for ext, path in variants.items():
+        _publish(path, final_path + ext)
+    _publish(tmp_path, final_path)
+
+
+def store_attachment(fileobj, filename: str, content_type: str = None) -> dict:
+    """
+    Store an uploaded file under its sha256 and take a reference on it.
+    Identical content is written to disk only once; later uploads just bump refcount.
+    The blob is on disk before the reference is taken, so a concurrent release of the
+    same digest can never leave a counted reference pointing at a missing file.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=ATTACHMENT_DIR, suffix=".part")
+    variants = _VariantWriter(tmp_path) if is_compressible(content_type) else None
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                out.write(chunk)
+                if variants is not None:
+                    variants.write(chunk)
+                size += len(chunk)
+        kept = {}
+        if variants is not None:
+            variants.close()
+            kept = variants.worthwhile(size)
+
+        digest = hasher.hexdigest()
+        final_path = blob_path(digest)
+        if not os.path.exists(final_path):
+            _place(tmp_path, kept, final_path)
+
+        attachments.find_one_and_update(
+            {"_id": digest},
+            {
+                "$inc": {"refcount": 1},
+                "$setOnInsert": {
+                    "size": size,
+                    "content_type": content_type,
+                    "filename": filename,
+                    "created_at": datetime.utcnow(),
+                },
+            },
+            upsert=True,
+        )
+
+        # A release that dropped the last reference just before our $inc may have
+        # removed the files; our reference now keeps them, so put them back.
+        if not os.path.exists(final_path):
+            _place(tmp_path, kept, final_path)
+    finally:
+        for p in [tmp_path] + (list(variants.paths.values()) if variants is not None else []):
+            if os.path.exists(p):
+                os.remove(p)
+
+    return {"digest": digest, "size": size, "url": attachment_url(digest, filename)}
+
+
+def release_attachment(digest: str):
+    """Drop one reference; the blob and its variants are removed with the last one."""
+    attachments.update_one({"_id": digest}, {"$inc": {"refcount": -1}})
+    # Only the caller whose conditional delete wins removes the files; a store that
+    # re-took a reference in between makes refcount positive and the delete a no-op
+    if attachments.find_one_and_delete({"_id": digest, "refcount": {"$lte": 0}}) is None:
+        return
+
+    path = blob_path(digest)
+    for p in (path, path + ".gz", path + ".br"):
+        if os.path.exists(p):
+            os.remove(p)
@@ -0,0 +1,173 @@
+# app/utils/bulk_import.py
+from pymongo.errors import BulkWriteError
+from app.db.database import approved_students, approved_teachers
+from app.utils.identity_registry import claim_many, confirm, release
+from app.utils.search_keys import name_keys
+
+
+STUDENT_IMPORT = {
+    "id_field": "roll_no",
+    "id_label": "Roll No",
+    "role": "student",
+    "target": approved_students,
+}
+
+TEACHER_IMPORT = {
+    "id_field": "employee_id",
+    "id_label": "Employee ID",
+    "role": "teacher",
+    "target": approved_teachers,
+}
+
+
+def unique_fields(spec: dict) -> list:
+    return [spec["id_field"], "phone", "email"]
+
+
+def new_import_state(spec: dict) -> dict:
+    # Carried across batches: first sheet row of every unique value, and the next sheet row number.
+    # A bulk job sets "claim_id" to its id so a re-run batch recognises its own claims.
+    return {"seen": {field: {} for field in unique_fields(spec)}, "line": 2, "claim_id": None}  # row 1 is the header
+
+
+def _in_file_reason(row: dict, error, fields: list, seen: dict):
+    reason = error or None
+    for field in fields:
+        if reason:
+            break
+        value = row[field]
+        if value in seen[field]:
+            reason = f"{field} duplicated in file (row {seen[field][value]})"
+    return reason
+
+
+def _mark_seen(row: dict, fields: list, seen: dict, line_no: int):
+    for field in fields:
+        seen[field][row[field]] = line_no
+
+
+def replay_rows(df, spec: dict, state: dict):
+    """
+    Rebuild `state` from a batch an earlier run already imported (job resume), so
+    in-file duplicates straddling the resume point are still rejected. Nothing is written.
+    """
+    from app.utils.bulk_validation import validate_frame
+
+    fields = unique_fields(spec)
+    df, errors = validate_frame(df, spec)
+    rows = df.to_dict("records")
+    for line_no, (row, error) in enumerate(zip(rows, errors.tolist()), start=state["line"]):
+        if not _in_file_reason(row, error, fields, state["seen"]):
+            _mark_seen(row, fields, state["seen"], line_no)
+    state["line"] += len(rows)
+
+
+def import_rows(df, spec: dict, state: dict = None) -> list:
+    """
+    Validate and insert one batch of sheet rows. Rows are validated column-wise in one
+    pass, in-file duplicates are caught against `state`, identifiers are claimed in the
+    identity registry with one insert_many (its unique index reports existing users),
+    and accepted rows go in with a single insert_many(ordered=False).
+    """
+    # Pulls in pandas; kept out of module import so workers start without it
+    from app.utils.bulk_validation import validate_frame
+
+    id_field, id_label = spec["id_field"], spec["id_label"]
+    fields = unique_fields(spec)
+    state = state or new_import_state(spec)
+    seen = state["seen"]
+
+    df, errors = validate_frame(df, spec)
+    rows = df.to_dict("records")
+    errors = errors.tolist()
+
+    results = []
+    pending_docs, pending_results = [], []
+
+    for line_no, (row, error) in enumerate(zip(rows, errors), start=state["line"]):
+        result = {id_label: row[id_field], "Name": row["full_name"], "Status": "Failed", "Reason": "-"}
+        results.append(result)
+
+        reason = _in_file_reason(row, error, fields, seen)
+        if reason:
+            result["Reason"] = reason
+            continue
+        _mark_seen(row, fields, seen, line_no)
+
+        data = {k: v for k, v in row.items() if v is not None}
+        data["name_keys"] = name_keys(data["full_name"])
+
+        pending_docs.append(data)
+        pending_results.append(result)
+
+    conflicts, reclaimed = claim_many(spec["role"], pending_docs, "approved", state.get("claim_id"))
+    # Rows this job already claimed before a crash may already be inserted too
+    already_in = set()
+    if reclaimed:
+        ids = [pending_docs[i][id_field] for i in reclaimed]
+        already_in = {d[id_field] for d in spec["target"].find({id_field: {"$in": ids}}, {"_id": 0, id_field: 1})}
+
+    claimed_docs, claimed_results = [], []
+    for i, (data, result) in enumerate(zip(pending_docs, pending_results)):
+        if i in conflicts:
+            result["Reason"] = str(conflicts[i])
+            continue
+        result["Status"] = "Registered"
+        if i in reclaimed and data[id_field] in already_in:
+            continue
+        claimed_docs.append(data)
+        claimed_results.append(result)
+
+    landed = [pending_docs[i][id_field] for i in reclaimed if pending_docs[i][id_field] in already_in]
+    if claimed_docs:
+        failed_ids = []
+        try:
+            spec["target"].insert_many(claimed_docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed = claimed_results[error["index"]]
+                failed["Status"] = "Failed"
+                failed["Reason"] = error.get("errmsg", "insert failed")
+                failed_ids.append(claimed_docs[error["index"]][id_field])
+            release(spec["role"], failed_ids)
+        except Exception:
+            # Network error, timeout, ...: some documents may have landed. Release the
+            # claims of those that didn't, or their identifiers stay blocked for good.
+            _release_unlanded(spec, [d[id_field] for d in claimed_docs])
+            raise
+        rejected = set(failed_ids)
+        landed.extend(d[id_field] for d in claimed_docs if d[id_field] not in rejected)
+    confirm(spec["role"], landed)
+
+    state["line"] += len(rows)
+    return results
+
+
+def _release_unlanded(spec: dict, ids: list):
+    id_field = spec["id_field"]
+    try:
+        landed = {d[id_field] for d in spec["target"].find({id_field: {"$in": ids}}, {"_id": 0, id_field: 1})}
+        release(spec["role"], [i for i in ids if i not in landed])
+    except Exception:
+        # Still unreachable; the caller re-raises the original error
+        pass
+
+
+IMPORT_SPECS = {"students": STUDENT_IMPORT, "teachers": TEACHER_IMPORT}
+
+
+def result_columns(spec: dict) -> list:
+    return [spec["id_label"], "Name", "Status", "Reason"]
+
+
+def write_results_workbook(results, spec: dict, output_path: str):
+    """Write per-row results (any iterable of result dicts) with a write-only workbook."""
+    from openpyxl import Workbook
+
+    columns = result_columns(spec)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Results")
+    sheet.append(columns)
+    for result in results:
+        sheet.append([result.get(c) for c in columns])
+    workbook.save(output_path)
@@ -0,0 +1,260 @@
+# app/utils/bulk_jobs.py
+import logging
+import os
+import shutil
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, ReplaceOne, ReturnDocument
+from app.core.config import BULK_IMPORT_WORKERS, BULK_JOB_RETENTION_SECONDS
+from app.db.database import bulk_jobs, bulk_job_results
+from app.utils.bulk_import import IMPORT_SPECS, import_rows, replay_rows, new_import_state, write_results_workbook
+from app.utils.bulk_reader import iter_row_batches, count_rows
+
+logger = logging.getLogger(__name__)
+
+# Uploaded sheets and result workbooks live here so a restart can pick jobs back up
+JOB_DIR = "uploads/bulk_jobs"
+# A running job renews its lease every batch; an expired lease means its worker died
+LEASE = timedelta(minutes=2)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+os.makedirs(JOB_DIR, exist_ok=True)
+
+_pool = ThreadPoolExecutor(max_workers=BULK_IMPORT_WORKERS, thread_name_prefix="bulk-import")
+_stop = threading.Event()
+# Jobs handed to _pool by this process and not yet finished, so the watchdog doesn't queue them twice
+_local_jobs = set()
+_local_lock = threading.Lock()
+
+
+class LeaseLost(Exception):
+    """Another worker claimed the job after this one's lease lapsed."""
+
+
+def submit_job(fileobj, filename: str, role: str) -> str:
+    job_id = uuid.uuid4().hex
+    suffix = os.path.splitext(filename or "")[-1].lower()
+    source_path = os.path.join(JOB_DIR, f"{job_id}{suffix}")
+    with open(source_path, "wb") as out:
+        shutil.copyfileobj(fileobj, out)
+
+    now = datetime.utcnow()
+    bulk_jobs.insert_one({
+        "_id": job_id,
+        "role": role,
+        "filename": filename,
+        "source_path": source_path,
+        "suffix": suffix,
+        "status": "queued",
+        "rows_total": None,
+        "rows_done": 0,
+        "rows_failed": 0,
+        "created_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "result_path": None,
+        "error": None,
+        "owner": WORKER_ID,
+        "claim_id": None,
+        "lease_until": now + LEASE,
+    })
+    _enqueue(job_id)
+    return job_id
+
+
+def get_job(job_id: str):
+    return bulk_jobs.find_one({"_id": job_id})
+
+
+def job_progress(job: dict) -> dict:
+    rows_total, rows_done = job.get("rows_total"), job.get("rows_done", 0)
+    eta_seconds = None
+    if job["status"] == "running" and job.get("started_at") and rows_total and 0 < rows_done < rows_total:
+        elapsed = (datetime.utcnow() - job["started_at"]).total_seconds()
+        eta_seconds = round(elapsed / rows_done * (rows_total - rows_done), 1)
+
+    return {
+        "job_id": job["_id"],
+        "role": job["role"],
+        "filename": job.get("filename"),
+        "status": job["status"],
+        "rows_total": rows_total,
+        "rows_done": rows_done,
+        "rows_failed": job.get("rows_failed", 0),
+        "eta_seconds": eta_seconds,
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "error": job.get("error"),
+        "result_url": f"/admin/register/bulk_jobs/{job['_id']}/result" if job["status"] == "completed" else None,
+    }
+
+
+def _renew_lease(job: dict, update: dict = None, inc: dict = None):
+    """Extend the lease (plus any extra fields) only while this run still holds the claim."""
+    change = {"$set": {"lease_until": datetime.utcnow() + LEASE, **(update or {})}}
+    if inc:
+        change["$inc"] = inc
+    if not bulk_jobs.update_one({"_id": job["_id"], "claim_id": job["claim_id"]}, change).matched_count:
+        raise LeaseLost(job["_id"])
+
+
+def _process(job: dict):
+    job_id = job["_id"]
+    spec = IMPORT_SPECS[job["role"]]
+
+    if job.get("rows_total") is None:
+        _renew_lease(job, {"rows_total": count_rows(job["source_path"], job["suffix"])})
+
+    # Resume after the last committed batch; earlier rows already have their results
+    # stored and are only replayed to rebuild the in-file duplicate state
+    skip = job.get("rows_done", 0)
+    state = new_import_state(spec)
+    state["claim_id"] = job_id
+
+    with open(job["source_path"], "rb") as fileobj:
+        for batch in iter_row_batches(fileobj, job["suffix"]):
+            if skip >= len(batch):
+                replay_rows(batch, spec, state)
+                skip -= len(batch)
+                continue
+            if skip:
+                replay_rows(batch.iloc[:skip], spec, state)
+                batch, skip = batch.iloc[skip:], 0
+
+            _renew_lease(job)
+            first_line = state["line"]
+            results = import_rows(batch, spec, state)
+            # Keyed by line, so a batch re-run after a crash replaces its results instead of repeating them
+            bulk_job_results.bulk_write([
+                ReplaceOne({"job_id": job_id, "line": first_line + i}, {"job_id": job_id, "line": first_line + i, **r}, upsert=True)
+                for i, r in enumerate(results)
+            ])
+            failed = sum(1 for r in results if r["Status"] != "Registered")
+            _renew_lease(job, inc={"rows_done": len(results), "rows_failed": failed})
+
+    result_path = os.path.join(JOB_DIR, f"{job_id}_result.xlsx")
+    results = bulk_job_results.find({"job_id": job_id}, {"_id": 0, "job_id": 0, "line": 0}).sort("line", ASCENDING)
+    write_results_workbook(results, spec, result_path)
+    return result_path
+
+
+def _claim(job_id: str):
+    """Atomically take a queued job, or a running one whose lease has lapsed."""
+    now = datetime.utcnow()
+    return bulk_jobs.find_one_and_update(
+        {
+            "_id": job_id,
+            "$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ],
+        },
+        {"$set": {
+            "status": "running",
+            "owner": WORKER_ID,
+            "claim_id": uuid.uuid4().hex,
+            "lease_until": now + LEASE,
+        }},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _enqueue(job_id: str):
+    with _local_lock:
+        if job_id in _local_jobs:
+            return
+        _local_jobs.add(job_id)
+    _pool.submit(_run_job, job_id)
+
+
+def _run_job(job_id: str):
+    try:
+        job = _claim(job_id)
+        if job:
+            _execute(job)
+    finally:
+        with _local_lock:
+            _local_jobs.discard(job_id)
+
+
+def _execute(job: dict):
+    job_id = job["_id"]
+    if not job.get("started_at"):
+        job["started_at"] = datetime.utcnow()
+        bulk_jobs.update_one({"_id": job_id}, {"$set": {"started_at": job["started_at"]}})
+
+    try:
+        result_path = _process(job)
+    except LeaseLost:
+        logger.warning("Bulk import job %s was taken over by another worker; stopping here", job_id)
+        return
+    except Exception as e:
+        logger.exception("Bulk import job %s failed", job_id)
+        bulk_jobs.update_one(
+            {"_id": job_id, "claim_id": job["claim_id"]},
+            {"$set": {"status": "failed", "error": str(e), "finished_at": datetime.utcnow()}},
+        )
+        return
+
+    finished = bulk_jobs.update_one(
+        {"_id": job_id, "claim_id": job["claim_id"]},
+        {"$set": {"status": "completed", "result_path": result_path, "finished_at": datetime.utcnow()}},
+    )
+    if finished.matched_count and os.path.exists(job["source_path"]):
+        os.remove(job["source_path"])
+
+
+def resume_jobs():
+    """
+    Queue jobs whose worker went away (restart or crash) without finishing them.
+    Nothing is taken here: _run_job's claim decides which worker actually runs a job.
+    """
+    stale = bulk_jobs.find(
+        {"status": {"$in": ["queued", "running"]}, "lease_until": {"$lt": datetime.utcnow()}},
+        {"rows_done": 1},
+    )
+    for job in stale:
+        logger.info("Resuming bulk import job %s at row %s", job["_id"], job.get("rows_done", 0))
+        _enqueue(job["_id"])
+
+
+def purge_finished_jobs() -> int:
+    """Delete completed/failed jobs older than the retention: files, per-row results and the job."""
+    cutoff = datetime.utcnow() - timedelta(seconds=BULK_JOB_RETENTION_SECONDS)
+    purged = 0
+    for job in bulk_jobs.find(
+        {"status": {"$in": ["completed", "failed"]}, "finished_at": {"$lt": cutoff}},
+        {"source_path": 1, "result_path": 1},
+    ):
+        for path in (job.get("source_path"), job.get("result_path")):
+            if path and os.path.exists(path):
+                os.remove(path)
+        bulk_job_results.delete_many({"job_id": job["_id"]})
+        bulk_jobs.delete_one({"_id": job["_id"]})
+        purged += 1
+    return purged
+
+
+def _watchdog():
+    while not _stop.wait(LEASE.total_seconds() / 2):
+        try:
+            resume_jobs()
+            purge_finished_jobs()
+        except Exception:
+            logger.exception("Bulk import watchdog failed")
+
+
+def start_job_runner():
+    """Resume orphaned jobs now, then keep checking for lapsed leases and expired jobs."""
+    resume_jobs()
+    threading.Thread(target=_watchdog, name="bulk-import-watchdog", daemon=True).start()
+
+
+def stop_job_runner():
+    _stop.set()
+    _pool.shutdown(wait=False)
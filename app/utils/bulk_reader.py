@@ -0,0 +1,68 @@
+# app/utils/bulk_reader.py
+# pandas/openpyxl are imported inside the functions: they cost every worker
+# time and memory at startup, and only the bulk import jobs need them.
+BATCH_SIZE = 500
+
+
+def _iter_xlsx(fileobj, batch_size: int):
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    # read_only mode streams rows from the zip instead of building the whole sheet in memory
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(h).strip() if h is not None else "" for h in header]
+        width = len(columns)
+
+        batch = []
+        for values in rows:
+            if all(v is None for v in values):
+                continue
+            values = tuple(values[:width]) + (None,) * (width - len(values))
+            batch.append(values)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def count_rows(path: str, suffix: str) -> int:
+    """Data rows in the sheet (header excluded); used for progress and ETA only."""
+    suffix = suffix.lower()
+    if suffix == ".xlsx":
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return max((workbook.active.max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+    if suffix == ".xls":
+        import pandas as pd
+        return len(pd.read_excel(path))
+    with open(path, "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def iter_row_batches(fileobj, suffix: str, batch_size: int = BATCH_SIZE):
+    """Yield the sheet as DataFrames of at most batch_size rows."""
+    suffix = suffix.lower()
+    if suffix == ".xlsx":
+        yield from _iter_xlsx(fileobj, batch_size)
+        return
+
+    import pandas as pd
+    if suffix == ".xls":
+        # xlrd has no streaming mode; legacy .xls sheets are capped at 65k rows anyway
+        df = pd.read_excel(fileobj)
+        for start in range(0, len(df), batch_size):
+            yield df.iloc[start:start + batch_size]
+    else:
+        # dtype=str keeps leading zeros in phone numbers and ids
+        yield from pd.read_csv(fileobj, chunksize=batch_size, dtype=str)
@@ -0,0 +1,93 @@
+# app/utils/bulk_validation.py
+from datetime import date
+
+import pandas as pd
+from app.schemas.validators import (
+    ID_PATTERN, PHONE_STRIP_PATTERN, PHONE_PREFIX_PATTERN, PHONE_PATTERN, EMAIL_PATTERN,
+    ROLL_NO_ERROR, EMPLOYEE_ID_ERROR, PHONE_ERROR,
+)
+
+ID_ERRORS = {"roll_no": ROLL_NO_ERROR, "employee_id": EMPLOYEE_ID_ERROR}
+# The template's format. Text dates are never guessed: DOB is the login password,
+# and "12/05/2003" vs "25/05/2003" would silently parse in different orders.
+DOB_FORMAT = "%Y-%m-%d"
+DOB_ERROR = "Invalid or missing date of birth (expected YYYY-MM-DD)"
+
+
+def dob_column(col: pd.Series) -> pd.Series:
+    """Real date cells as-is; text only in DOB_FORMAT; anything else NaT."""
+    is_date = col.map(lambda v: isinstance(v, date))
+    from_cells = pd.to_datetime(col.where(is_date), errors="coerce")
+    from_text = pd.to_datetime(text_column(col.where(~is_date)), format=DOB_FORMAT, exact=True, errors="coerce")
+    return from_cells.where(is_date, from_text)
+
+
+def text_column(col: pd.Series) -> pd.Series:
+    """
+    Column as trimmed strings with "" for blanks. Whole-number cells that came in
+    as numbers (9876543210.0 from a sheet with blanks) lose the trailing ".0";
+    cells that were already text are kept as-is so leading zeros survive.
+    """
+    numeric = pd.to_numeric(col, errors="coerce")
+    was_text = col.map(type).eq(str)
+    integral = numeric.notna() & numeric.mod(1).eq(0) & ~was_text
+
+    text = col.astype("string")
+    if integral.any():
+        text = text.mask(integral, numeric.where(integral).astype("Int64").astype("string"))
+    return text.str.strip().fillna("")
+
+
+def validate_frame(df: pd.DataFrame, spec: dict):
+    """
+    Apply the StudentRegister/TeacherRegister rules column-wise over a batch.
+    Returns (normalized frame, per-row error Series with "" for valid rows).
+    """
+    df = df.copy()
+    if "name" in df.columns:
+        # Rename "name" column to "full_name"
+        df = df.rename(columns={"name": "full_name"})
+    for col in (spec["id_field"], "full_name", "phone", "email", "dob"):
+        if col not in df.columns:
+            df[col] = None
+
+    id_field = spec["id_field"]
+    ids = text_column(df[id_field])
+    if id_field == "employee_id":
+        ids = ids.str.upper()
+    phones = (
+        text_column(df["phone"])
+        .str.replace(PHONE_STRIP_PATTERN, "", regex=True)
+        .str.replace(PHONE_PREFIX_PATTERN, "", n=1, regex=True)
+    )
+    emails = text_column(df["email"])
+    names = text_column(df["full_name"])
+    dobs = dob_column(df["dob"])
+
+    checks = [
+        (names.ne(""), "Name is required"),
+        (ids.str.fullmatch(ID_PATTERN).fillna(False), ID_ERRORS[id_field]),
+        (phones.str.fullmatch(PHONE_PATTERN).fillna(False), PHONE_ERROR),
+        (emails.str.fullmatch(EMAIL_PATTERN).fillna(False), "Invalid email address"),
+        (dobs.notna(), DOB_ERROR),
+    ]
+    if "semester" in df.columns:
+        semesters = pd.to_numeric(df["semester"], errors="coerce")
+        whole = semesters.notna() & semesters.mod(1).eq(0)
+        checks.append((whole, "Semester must be a whole number"))
+        df["semester"] = semesters.where(whole).astype("Int64")
+
+    # First failing rule per row wins, like the schema validators raising in order
+    errors = pd.Series("", index=df.index, dtype="string")
+    for ok, message in checks:
+        errors = errors.mask(~ok.astype(bool) & errors.eq(""), message)
+
+    df[id_field] = ids
+    df["phone"] = phones
+    df["email"] = emails
+    df["full_name"] = names
+    df["dob"] = dobs.dt.strftime("%Y-%m-%d").fillna("")
+
+    # Missing cells become None so rows convert to plain dicts
+    df = df.astype(object).where(df.notna(), None)
+    return df, errors.astype(object)
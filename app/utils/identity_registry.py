@@ -0,0 +1,261 @@
+# app/utils/identity_registry.py
+# One document per (role, kind, value) under a unique index, e.g.
+#   {"role": "student", "kind": "phone", "value": "9876543210", "owner": "123456", "status": "pending"}
+# Registering claims every identifier with a single insert; the unique index
+# rejects duplicates atomically, including two registrations racing each other.
+from datetime import datetime, timedelta
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.db.database import (
+    identities,
+    pending_students, approved_students, rejected_students,
+    pending_teachers, approved_teachers, rejected_teachers
+)
+
+ROLE_FIELDS = {
+    "student": ("roll_no", "phone", "email"),
+    "teacher": ("employee_id", "phone", "email"),
+}
+DUPLICATE_KEY = 11000
+# A claim is written before its user document; until confirm() it carries
+# unconfirmed_since. Older than this with no user document = the writer died in between.
+UNCONFIRMED_GRACE = timedelta(minutes=10)
+# Stored in the registry itself once the startup backfill has completed; no real role matches it
+BACKFILL_MARKER = {"role": "_meta", "kind": "backfill", "value": "identities-v1"}
+
+
+class IdentityConflict(Exception):
+    def __init__(self, kind: str, status: str):
+        super().__init__(f"{kind} already exists ({status})")
+        self.kind = kind
+        self.status = status
+
+
+def normalize(kind: str, value) -> str:
+    value = str(value or "").strip()
+    if kind == "email":
+        return value.lower()
+    if kind == "employee_id":
+        return value.upper()
+    return value
+
+
+def identity_docs(role: str, data: dict, status: str) -> list:
+    id_field = ROLE_FIELDS[role][0]
+    owner = normalize(id_field, data[id_field])
+    now = datetime.utcnow()
+    return [
+        {"role": role, "kind": kind, "value": normalize(kind, data.get(kind)), "owner": owner, "status": status, "claimed_at": now}
+        for kind in ROLE_FIELDS[role]
+        if normalize(kind, data.get(kind))
+    ]
+
+
+def _status_of(role: str, kind: str, value: str) -> str:
+    existing = identities.find_one({"role": role, "kind": kind, "value": value}, {"_id": 0, "status": 1})
+    return existing["status"] if existing else "pending"
+
+
+def claim(role: str, data: dict, status: str = "pending"):
+    """Claim all identifiers of one user, or raise IdentityConflict for the first taken one."""
+    docs = identity_docs(role, data, status)
+    for doc in docs:
+        doc["unconfirmed_since"] = doc["claimed_at"]
+    try:
+        identities.insert_many(docs, ordered=True)
+    except BulkWriteError as e:
+        inserted = e.details.get("nInserted", 0)
+        if inserted:
+            identities.delete_many({"_id": {"$in": [d["_id"] for d in docs[:inserted]]}})
+        error = e.details["writeErrors"][0]
+        if error.get("code") != DUPLICATE_KEY:
+            raise
+        failed = docs[error["index"]]
+        raise IdentityConflict(failed["kind"], _status_of(role, failed["kind"], failed["value"]))
+
+
+def claim_many(role: str, rows: list, status: str, claim_id: str = None):
+    """
+    Claim identifiers for many users with one unordered insert_many.
+    Returns ({row index: IdentityConflict}, reclaimed row indexes). Rows that lost a
+    claim have their other claims released, so only fully claimed rows keep any.
+    With `claim_id` (a bulk job id) claims are tagged, and a claim already held by the
+    same owner under the same claim_id (a batch re-run after a crash) counts as won;
+    such rows are returned as reclaimed, since their user document may already exist.
+    """
+    docs, row_of = [], []
+    for i, data in enumerate(rows):
+        for doc in identity_docs(role, data, status):
+            doc["unconfirmed_since"] = doc["claimed_at"]
+            if claim_id:
+                doc["claim_id"] = claim_id
+            docs.append(doc)
+            row_of.append(i)
+    if not docs:
+        return {}, set()
+
+    failed_docs = {}
+    try:
+        identities.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            if error.get("code") != DUPLICATE_KEY:
+                raise
+            failed_docs[error["index"]] = docs[error["index"]]
+
+    if not failed_docs:
+        return {}, set()
+
+    existing = {}
+    for kind in ROLE_FIELDS[role]:
+        values = [d["value"] for d in failed_docs.values() if d["kind"] == kind]
+        if values:
+            for doc in identities.find(
+                {"role": role, "kind": kind, "value": {"$in": values}},
+                {"_id": 0, "value": 1, "status": 1, "owner": 1, "claim_id": 1},
+            ):
+                existing[(kind, doc["value"])] = doc
+
+    reclaimed = set()
+    for index, doc in list(failed_docs.items()):
+        holder = existing.get((doc["kind"], doc["value"]))
+        if claim_id and holder and holder.get("claim_id") == claim_id and holder["owner"] == doc["owner"]:
+            del failed_docs[index]
+            reclaimed.add(row_of[index])
+
+    # Report the first identifier (in ROLE_FIELDS order) that was already taken
+    order = {kind: n for n, kind in enumerate(ROLE_FIELDS[role])}
+    conflicts = {}
+    for index, doc in sorted(failed_docs.items(), key=lambda item: order[item[1]["kind"]]):
+        conflicts.setdefault(row_of[index], doc)
+
+    # Release what conflicting rows won in this call (never claims held from an earlier run)
+    release_ids = [
+        d["_id"] for i, d in enumerate(docs)
+        if row_of[i] in conflicts and i not in failed_docs and (d["kind"], d["value"]) not in existing
+    ]
+    if release_ids:
+        identities.delete_many({"_id": {"$in": release_ids}})
+
+    return {
+        row: IdentityConflict(doc["kind"], existing.get((doc["kind"], doc["value"]), {}).get("status", "pending"))
+        for row, doc in conflicts.items()
+    }, reclaimed - set(conflicts)
+
+
+def _owners(role: str, owners: list) -> list:
+    return [normalize(ROLE_FIELDS[role][0], owner) for owner in owners]
+
+
+def confirm(role: str, owners: list):
+    """Mark claims as backed by a stored user document (call right after inserting it)."""
+    if owners:
+        identities.update_many(
+            {"role": role, "owner": {"$in": _owners(role, owners)}, "unconfirmed_since": {"$exists": True}},
+            {"$unset": {"unconfirmed_since": ""}},
+        )
+
+
+def release(role: str, owners: list, session=None):
+    identities.delete_many({"role": role, "owner": {"$in": _owners(role, owners)}}, session=session)
+
+
+def set_status(role: str, owners: list, status: str, session=None):
+    """Keep registry statuses in step with the collection a user was moved to."""
+    identities.update_many({"role": role, "owner": {"$in": _owners(role, owners)}}, {"$set": {"status": status}}, session=session)
+
+
+def change_identifier(role: str, owner: str, kind: str, old_value, new_value, status: str = "approved"):
+    """Move one identifier (e.g. an email edit) to a new value, raising IdentityConflict if taken."""
+    owner = normalize(ROLE_FIELDS[role][0], owner)
+    new_value = normalize(kind, new_value)
+    if new_value == normalize(kind, old_value):
+        return
+    try:
+        identities.insert_one({"role": role, "kind": kind, "value": new_value, "owner": owner, "status": status, "claimed_at": datetime.utcnow()})
+    except DuplicateKeyError:
+        raise IdentityConflict(kind, _status_of(role, kind, new_value))
+    identities.delete_one({"role": role, "kind": kind, "value": normalize(kind, old_value), "owner": owner})
+
+
+def _user_sources():
+    return [
+        ("student", pending_students, "pending"), ("student", approved_students, "approved"), ("student", rejected_students, "rejected"),
+        ("teacher", pending_teachers, "pending"), ("teacher", approved_teachers, "approved"), ("teacher", rejected_teachers, "rejected"),
+    ]
+
+
+def drop_orphaned_claims(older_than: timedelta = UNCONFIRMED_GRACE) -> dict:
+    """
+    Settle claims left unconfirmed by a writer that died between claiming and inserting:
+    confirmed if the user document exists after all, otherwise deleted.
+    """
+    cutoff = datetime.utcnow() - older_than
+    stale = {}
+    for doc in identities.find({"unconfirmed_since": {"$lt": cutoff}}, {"_id": 0, "role": 1, "owner": 1}):
+        stale.setdefault(doc["role"], set()).add(doc["owner"])
+
+    confirmed, dropped = 0, 0
+    for role, owners in stale.items():
+        id_field = ROLE_FIELDS[role][0]
+        present = set()
+        for source_role, collection, _ in _user_sources():
+            if source_role == role:
+                present.update(d[id_field] for d in collection.find({id_field: {"$in": list(owners)}}, {"_id": 0, id_field: 1}))
+        present = {normalize(id_field, owner) for owner in present}
+        if present:
+            confirm(role, list(present))
+            confirmed += len(present)
+        orphaned = list(owners - present)
+        if orphaned:
+            dropped += identities.delete_many(
+                {"role": role, "owner": {"$in": orphaned}, "unconfirmed_since": {"$lt": cutoff}}
+            ).deleted_count
+    return {"confirmed_owners": confirmed, "dropped_claims": dropped}
+
+
+def backfill_identities() -> dict:
+    """
+    Claim identifiers for users registered before the registry existed, after
+    dropping claims orphaned by a registration that never stored its user.
+    """
+    orphans = drop_orphaned_claims()
+    claimed = 0
+    for role, collection, status in _user_sources():
+        batch = []
+        for doc in collection.find({}, {field: 1 for field in ROLE_FIELDS[role]}):
+            if doc.get(ROLE_FIELDS[role][0]):
+                batch.extend(identity_docs(role, doc, status))
+            if len(batch) >= 1000:
+                claimed += _insert_ignoring_duplicates(batch)
+                batch = []
+        if batch:
+            claimed += _insert_ignoring_duplicates(batch)
+    return {"claimed": claimed, **orphans}
+
+
+def ensure_identities_backfilled():
+    """
+    Run backfill_identities once per deployment, at startup like the index setup, so
+    users registered before the registry existed block duplicate phone/email at once.
+    Later starts only drop orphaned claims.
+    Safe to run from several workers together: claims are idempotent.
+    """
+    if identities.find_one(BACKFILL_MARKER, {"_id": 1}):
+        # Backfill done before; orphaned claims can appear at any time, so settle those
+        return drop_orphaned_claims()
+    result = backfill_identities()
+    try:
+        identities.insert_one({**BACKFILL_MARKER, "completed_at": datetime.utcnow(), **result})
+    except DuplicateKeyError:
+        pass  # another worker finished first
+    return result
+
+
+def _insert_ignoring_duplicates(docs: list) -> int:
+    try:
+        return len(identities.insert_many(docs, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nInserted", 0)
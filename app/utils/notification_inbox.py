@@ -0,0 +1,185 @@
+# app/utils/notification_inbox.py
+# Write-time fan-out: each notification gets one small entry per audience key
+# (class:<BRANCH>|<SECTION>|<SEMESTER>, all, roll:<ROLL_NO>), so a student's feed
+# is an indexed $in over three keys. Entries expire through a TTL index on expires_at.
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.db.database import notification_inbox, notifications, admin_notifications
+
+# String _id: never matched by feed queries or by rebuild_inbox's ObjectId-ranged cleanup
+REBUILD_MARKER_ID = "_meta:initial-rebuild"
+# A startup rebuild marked running for longer than this is assumed dead and retaken
+REBUILD_STALE_AFTER = timedelta(hours=1)
+
+ALL_KEY = "all"
+TEACHER = "teacher"
+ADMIN = "admin"
+
+
+def class_key(branch, section, semester) -> str:
+    return f"class:{str(branch or '').strip().upper()}|{str(section or '').strip().upper()}|{str(semester or '').strip()}"
+
+
+def roll_key(roll_no) -> str:
+    return f"roll:{str(roll_no).strip().upper()}"
+
+
+def audiences_for(target_type, branch="", section="", semester="", roll_numbers=None) -> list:
+    if target_type == "all":
+        return [ALL_KEY]
+    if target_type == "individual":
+        return [roll_key(r) for r in roll_numbers or [] if str(r).strip()]
+    return [class_key(branch, section, semester)]
+
+
+def student_audiences(branch, section, semester, roll_no) -> list:
+    return [class_key(branch, section, semester), ALL_KEY, roll_key(roll_no)]
+
+
+def fan_out(source: str, notification_id, audiences: list, sort_key: datetime, expires_at: datetime, rebuild_id=None):
+    docs = [
+        {
+            "audience": audience,
+            "source": source,
+            "notification_id": notification_id,
+            "sort_key": sort_key,
+            "expires_at": expires_at,
+        }
+        for audience in dict.fromkeys(audiences)
+    ]
+    if not docs:
+        return
+    if rebuild_id is None:
+        notification_inbox.insert_many(docs, ordered=False)
+        return
+    # Rebuild: upsert in place and tag, so the feed never goes empty while it runs
+    notification_inbox.bulk_write([
+        UpdateOne(
+            {"notification_id": notification_id, "audience": doc["audience"]},
+            {"$set": {**doc, "rebuild_id": rebuild_id}},
+            upsert=True,
+        )
+        for doc in docs
+    ], ordered=False)
+
+
+def remove(notification_id):
+    notification_inbox.delete_many({"notification_id": notification_id})
+
+
+def feed_entries(audiences: list, now: datetime, source: str = None) -> list:
+    """Inbox entries for the given audience keys, newest first, de-duplicated by notification."""
+    query = {"audience": {"$in": audiences}, "expires_at": {"$gt": now}}
+    if source:
+        query["source"] = source
+    cursor = notification_inbox.find(
+        query, {"_id": 0, "source": 1, "notification_id": 1}
+    ).sort("sort_key", -1)
+
+    seen = set()
+    entries = []
+    for entry in cursor:
+        if entry["notification_id"] not in seen:
+            seen.add(entry["notification_id"])
+            entries.append(entry)
+    return entries
+
+
+def fan_out_teacher_notification(notif: dict, rebuild_id=None):
+    fan_out(
+        TEACHER,
+        notif["_id"],
+        audiences_for(
+            notif.get("target_type"),
+            notif.get("target_branch"),
+            notif.get("target_section"),
+            notif.get("target_semester"),
+            notif.get("roll_numbers"),
+        ),
+        notif.get("timestamp"),
+        notif.get("expiry_time"),
+        rebuild_id,
+    )
+
+
+def fan_out_admin_notification(notif: dict, expires_at: datetime, rebuild_id=None):
+    fan_out(
+        ADMIN,
+        notif["_id"],
+        audiences_for(
+            notif.get("target_type"),
+            notif.get("branch"),
+            notif.get("section"),
+            notif.get("semester"),
+            notif.get("roll_numbers"),
+        ),
+        notif.get("created_at"),
+        expires_at,
+        rebuild_id,
+    )
+
+
+def rebuild_inbox() -> dict:
+    """
+    Backfill the inbox from both notification collections (existing data / recovery).
+    Entries are upserted in place and tagged with this run; stale ones are deleted at
+    the end, so feeds stay complete throughout and a failed run leaves them intact.
+    """
+    from app.api.student_notification import safe_datetime
+
+    now = datetime.utcnow()
+    rebuild_id = ObjectId()
+    counts = {TEACHER: 0, ADMIN: 0}
+
+    for n in notifications.find({}):
+        expires_at = safe_datetime(n.get("expiry_time"))
+        if expires_at > now:
+            n["expiry_time"] = expires_at
+            fan_out_teacher_notification(n, rebuild_id)
+            counts[TEACHER] += 1
+
+    for n in admin_notifications.find({}):
+        expires_at = safe_datetime(n.get("expiry_time"))
+        if expires_at > now:
+            fan_out_admin_notification(n, expires_at, rebuild_id)
+            counts[ADMIN] += 1
+
+    # Entries not touched by this run: deleted/expired notifications or old audiences.
+    # Anything fanned out normally since the run started has a newer _id and is kept.
+    started = ObjectId.from_datetime(rebuild_id.generation_time)
+    stale = notification_inbox.delete_many({"rebuild_id": {"$ne": rebuild_id}, "_id": {"$lt": started}})
+    counts["removed"] = stale.deleted_count
+    return counts
+
+
+def ensure_inbox_built():
+    """
+    Fill the inbox for notifications that existed before it, once per deployment, at
+    startup like the index setup. One worker takes the marker and runs the rebuild;
+    concurrent rebuilds could delete each other's entries as stale.
+    """
+    now = datetime.utcnow()
+    try:
+        notification_inbox.insert_one({"_id": REBUILD_MARKER_ID, "state": "running", "started_at": now})
+    except DuplicateKeyError:
+        marker = notification_inbox.find_one_and_update(
+            {"_id": REBUILD_MARKER_ID, "state": "running", "started_at": {"$lt": now - REBUILD_STALE_AFTER}},
+            {"$set": {"started_at": now}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if marker is None:
+            return None  # done, or another worker is on it
+
+    try:
+        counts = rebuild_inbox()
+    except Exception:
+        # Let the next start try again
+        notification_inbox.delete_one({"_id": REBUILD_MARKER_ID, "started_at": now})
+        raise
+    notification_inbox.update_one(
+        {"_id": REBUILD_MARKER_ID},
+        {"$set": {"state": "done", "completed_at": datetime.utcnow(), "counts": counts}},
+    )
+    return counts
@@ -0,0 +1,92 @@
+# app/utils/pagination.py
+from typing import Literal, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from app.core.responses import dumps
+from app.utils.photo_store import photo_url
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+# Never sent by list endpoints, even when asked for explicitly
+HIDDEN_FIELDS = {"photo"}
+
+
+class ListParams:
+    """Shared query parameters for keyset-paginated list endpoints."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=f"Page size (default {DEFAULT_PAGE_SIZE}; ndjson streams everything unless set)"),
+        after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+        format: Literal["json", "ndjson"] = Query("json"),
+    ):
+        self.limit = limit
+        self.after = after
+        self.fields = fields
+        self.format = format
+
+
+def build_projection(fields: Optional[str]) -> dict:
+    default = {name: 0 for name in HIDDEN_FIELDS}
+    if not fields:
+        return default
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    # _id is always fetched: it is the pagination key
+    included = {
+        name: 1 for name in names
+        if name.split(".")[0] not in HIDDEN_FIELDS and name != "_id"
+    }
+    # An empty projection means "everything" to MongoDB, hidden fields included
+    return included or default
+
+
+def serialize_document(doc: dict) -> dict:
+    doc.pop("_id", None)
+    if "photo_id" in doc:
+        doc["photo_url"] = photo_url(doc.pop("photo_id"))
+    return doc
+
+
+def _keyset_query(query: dict, after: Optional[str]) -> dict:
+    if not after:
+        return query
+    try:
+        return {**query, "_id": {"$gt": ObjectId(after)}}
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def list_documents(collection, query: dict, params: ListParams):
+    """Keyset pagination on _id, as a JSON page or an NDJSON stream."""
+    query = _keyset_query(query, params.after)
+    projection = build_projection(params.fields)
+
+    if params.format == "ndjson":
+        cursor = collection.find(query, projection, batch_size=STREAM_BATCH_SIZE).sort("_id", 1)
+        if params.limit:
+            cursor = cursor.limit(params.limit)
+
+        def generate():
+            # Documents are written as the cursor yields them; memory is one batch at most
+            for doc in cursor:
+                yield dumps(serialize_document(doc)) + b"\n"
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    limit = params.limit or DEFAULT_PAGE_SIZE
+    docs = list(collection.find(query, projection).sort("_id", 1).limit(limit + 1))
+    headers = {}
+    if len(docs) > limit:
+        docs = docs[:limit]
+        headers["X-Next-Cursor"] = str(docs[-1]["_id"])
+    return Response(
+        content=dumps([serialize_document(d) for d in docs]),
+        media_type="application/json",
+        headers=headers,
+    )
@@ -0,0 +1,165 @@
+# app/utils/photo_store.py
+import base64
+import binascii
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import gridfs
+from gridfs.errors import NoFile
+from bson import ObjectId
+from bson.errors import InvalidId
+from app.db.database import db
+from app.core.config import PHOTO_THUMBNAIL_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Profile photos live in GridFS (photos.files / photos.chunks) as raw bytes,
+# so user documents only carry a small photo_id.
+photos_fs = gridfs.GridFSBucket(db, bucket_name="photos")
+photo_files = db["photos.files"]
+
+PHOTO_URL_PREFIX = "/photos/"
+
+# Precomputed variants: longest edge in px, each stored as WebP and JPEG
+THUMBNAIL_SIZES = (64, 256, 1024)
+THUMBNAIL_FORMATS = {"image/webp": ("WEBP", {"quality": 80, "method": 4}), "image/jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True})}
+
+# Resizing runs off the request path; the upload returns before variants exist
+_thumbnail_pool = ThreadPoolExecutor(max_workers=PHOTO_THUMBNAIL_WORKERS, thread_name_prefix="thumbnails")
+
+
+def sniff_image_type(data: bytes) -> str:
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def save_photo(content: bytes, content_type: str, owner_type: str, owner_id: str) -> ObjectId:
+    if not content_type or not content_type.startswith("image/"):
+        content_type = sniff_image_type(content)
+    return photos_fs.upload_from_stream(
+        f"{owner_type}_{owner_id}",
+        content,
+        metadata={"owner_type": owner_type, "owner_id": owner_id, "content_type": content_type},
+    )
+
+
+def delete_photo(photo_id):
+    try:
+        photo_id = ObjectId(photo_id)
+    except InvalidId:
+        return
+    variant_ids = [f["_id"] for f in photo_files.find({"metadata.variant_of": photo_id}, {"_id": 1})]
+    for file_id in [photo_id] + variant_ids:
+        try:
+            photos_fs.delete(file_id)
+        except NoFile:
+            pass
+
+
+def generate_thumbnails(photo_id: ObjectId, content: bytes):
+    """Write every THUMBNAIL_SIZES x THUMBNAIL_FORMATS variant of a photo into the photo store."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(content)) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+
+    for size in THUMBNAIL_SIZES:
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        for content_type, (fmt, options) in THUMBNAIL_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, **options)
+            photos_fs.upload_from_stream(
+                f"{photo_id}_{size}",
+                buffer.getvalue(),
+                metadata={"variant_of": photo_id, "size": size, "content_type": content_type},
+            )
+
+
+def _generate_thumbnails_logged(photo_id: ObjectId, content: bytes = None):
+    try:
+        if content is None:
+            content = photos_fs.open_download_stream(photo_id).read()
+        generate_thumbnails(photo_id, content)
+    except Exception:
+        logger.exception("Thumbnail generation failed for photo %s", photo_id)
+
+
+def schedule_thumbnails(photo_id: ObjectId, content: bytes = None):
+    """Queue variant generation; without `content` the worker reads the original back from GridFS."""
+    _thumbnail_pool.submit(_generate_thumbnails_logged, photo_id, content)
+
+
+def pick_thumbnail_size(requested: int) -> int:
+    """Smallest precomputed size that covers the request (largest one if nothing does)."""
+    for size in THUMBNAIL_SIZES:
+        if size >= requested:
+            return size
+    return THUMBNAIL_SIZES[-1]
+
+
+def open_thumbnail(photo_id: str, size: int, content_type: str):
+    """Returns the GridOut of a variant, or None if it is unknown or not generated yet."""
+    try:
+        photo_id = ObjectId(photo_id)
+    except InvalidId:
+        return None
+    variant = photo_files.find_one(
+        {"metadata.variant_of": photo_id, "metadata.size": size, "metadata.content_type": content_type},
+        {"_id": 1},
+    )
+    return photos_fs.open_download_stream(variant["_id"]) if variant else None
+
+
+def open_photo(photo_id: str):
+    """Returns a GridOut, or None if the id is malformed or unknown."""
+    try:
+        return photos_fs.open_download_stream(ObjectId(photo_id))
+    except (NoFile, InvalidId):
+        return None
+
+
+def photo_url(photo_id):
+    return f"{PHOTO_URL_PREFIX}{photo_id}" if photo_id else None
+
+
+def replace_photo(collection, query: dict, content: bytes, content_type: str, owner_type: str, owner_id: str) -> ObjectId:
+    """Store a new photo for the matching user, drop any inline base64 copy and the previous blob."""
+    previous = collection.find_one(query, {"_id": 0, "photo_id": 1})
+    photo_id = save_photo(content, content_type, owner_type, owner_id)
+    collection.update_one(query, {"$set": {"photo_id": photo_id}, "$unset": {"photo": ""}})
+    schedule_thumbnails(photo_id, content)
+    if previous and previous.get("photo_id"):
+        delete_photo(previous["photo_id"])
+    return photo_id
+
+
+def migrate_inline_photos(collection, owner_type: str, id_field: str) -> dict:
+    """
+    Move base64 `photo` fields into GridFS. Safe to re-run; already migrated docs are skipped.
+    Thumbnails are left to the thumbnail pool, so the request only pays for the uploads.
+    """
+    migrated, failed = 0, 0
+    cursor = collection.find(
+        {"photo": {"$type": "string"}}, {"_id": 1, "photo": 1, id_field: 1}, batch_size=50
+    )
+    for doc in cursor:
+        try:
+            content = base64.b64decode(doc["photo"], validate=True)
+        except (binascii.Error, ValueError):
+            failed += 1
+            continue
+        photo_id = save_photo(content, None, owner_type, str(doc.get(id_field, "")))
+        collection.update_one({"_id": doc["_id"]}, {"$set": {"photo_id": photo_id}, "$unset": {"photo": ""}})
+        # Only the id is queued, so a large migration doesn't hold every photo in memory
+        schedule_thumbnails(photo_id)
+        migrated += 1
+    return {"migrated": migrated, "failed": failed}
@@ -0,0 +1,22 @@
+# app/utils/search_keys.py
+import re
+
+
+def normalize_name(full_name) -> str:
+    return " ".join(str(full_name or "").lower().split())
+
+
+def name_keys(full_name) -> list:
+    """
+    Lowercase keys stored on each user document for indexed prefix search:
+    the whole normalized name plus each word, so "ravi ku" and "kum" both match "Ravi Kumar".
+    """
+    normalized = normalize_name(full_name)
+    if not normalized:
+        return []
+    return list(dict.fromkeys([normalized] + normalized.split(" ")))
+
+
+def prefix_regex(term: str) -> dict:
+    # Anchored, case-sensitive regexes can use an index range scan
+    return {"$regex": "^" + re.escape(term)}
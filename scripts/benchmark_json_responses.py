@@ -0,0 +1,76 @@
+"""
+Render time of a large list response: the stock path (jsonable_encoder, then
+JSONResponse) vs. returning FastJSONResponse directly (orjson, no encoder pass).
+
+    python scripts/benchmark_json_responses.py --rows 5000 --days 20 --repeat 5
+
+Rows mimic a class register: an ObjectId, a datetime and a per-day attendance map.
+Both paths are checked to decode to the same JSON before timing.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bson import ObjectId  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from app.core.responses import FastJSONResponse  # noqa: E402
+
+
+def rows(count: int, days: int) -> list:
+    start = datetime(2024, 1, 1, 9, 0)
+    return [
+        {
+            "_id": ObjectId(),
+            "roll_no": f"{100000 + i}",
+            "name": f"Student {i}",
+            "class_id": f"CSE-{i % 4}",
+            "created_at": start + timedelta(minutes=i),
+            "attendance": {
+                (start + timedelta(days=d)).strftime("%Y-%m-%d"): (i + d) % 5 != 0 for d in range(days)
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def stock(payload) -> bytes:
+    return JSONResponse(jsonable_encoder(payload, custom_encoder={ObjectId: str})).body
+
+
+def fast(payload) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+def run(label: str, render, payload, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = render(payload)
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<32} best of {repeat}: {best * 1000:8.1f} ms  ({len(body) / 1024:.0f} KiB)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = rows(args.rows, args.days)
+    assert json.loads(stock(payload)) == json.loads(fast(payload)), "outputs differ"
+
+    before = run("jsonable_encoder + JSONResponse", stock, payload, args.repeat)
+    after = run("FastJSONResponse", fast, payload, args.repeat)
+    print(f"speedup {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Throughput of send_email's SMTP path: one connection per message (the old
+behaviour) vs. the SMTPConnectionPool, against a local aiosmtpd stand-in.
+
+    pip install aiosmtpd
+    python scripts/benchmark_smtp_pool.py --messages 300 --pool-size 2
+
+Loopback without TLS or AUTH, so the numbers understate the gain against a real
+server, where every new connection also pays a TLS handshake and a login.
+"""
+import argparse
+import os
+import smtplib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from app.core.email_utils import SMTPConnectionPool  # noqa: E402
+
+
+class Sink:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def message(i: int) -> MIMEText:
+    msg = MIMEText(f"Your registration has been approved. ({i})")
+    msg["Subject"] = "Registration approved"
+    msg["From"] = "noreply@example.com"
+    msg["To"] = f"student{i}@example.com"
+    return msg
+
+
+def connect_per_message(host: str, port: int):
+    def send(msg):
+        with smtplib.SMTP(host, port, timeout=30) as server:
+            server.send_message(msg)
+    return send
+
+
+def run(label: str, send, messages: int, concurrency: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, (message(i) for i in range(messages))))
+    elapsed = time.perf_counter() - started
+    rate = messages / elapsed
+    print(f"{label:<22} {messages} messages in {elapsed:.2f}s  {rate:8.1f} msg/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    sink = Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=args.port)
+    controller.start()
+    try:
+        before = run("connection per message", connect_per_message("127.0.0.1", args.port), args.messages, args.pool_size)
+
+        pool = SMTPConnectionPool("127.0.0.1", args.port, None, None, starttls=False, size=args.pool_size)
+        after = run("connection pool", pool.send, args.messages, args.pool_size)
+        pool.close_all()
+
+        stats = pool.stats()
+        print(f"speedup {after / before:.2f}x  (pool connects={stats['connects']} reconnects={stats['reconnects']})")
+        print(f"stand-in received {sink.received} messages")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# tests/test_email_delivery.py
+# Outbox delivery and the SMTP pool against a real local SMTP server (aiosmtpd).
+# The outbox collection is an in-memory stand-in covering only the operations the
+# outbox issues, so the test runs without MongoDB.
+import os
+import socket
+
+import pytest
+
+os.environ.setdefault("SMTP_PORT", "587")
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+from app.core import email_outbox, email_utils  # noqa: E402
+from app.core.email_utils import SMTPConnectionPool  # noqa: E402
+
+
+class Sink:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+class OutboxCollection:
+    """insert_one / find_one_and_update / update_one as email_outbox uses them."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def insert_one(self, doc):
+        doc["_id"] = len(self.docs) + 1
+        self.docs[doc["_id"]] = doc
+
+        class Result:
+            inserted_id = doc["_id"]
+        return Result()
+
+    def find_one_and_update(self, query, update, sort=None, return_document=None):
+        for doc in self.docs.values():
+            queued = doc["status"] == "queued" and doc["next_attempt_at"] <= query["$or"][0]["next_attempt_at"]["$lte"]
+            if queued:
+                doc.update(update["$set"])
+                return dict(doc)
+        return None
+
+    def update_one(self, query, update):
+        doc = self.docs[query["_id"]]
+        doc.update(update.get("$set", {}))
+        for field in update.get("$unset", {}):
+            doc.pop(field, None)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    sink = Sink()
+    controller = aiosmtpd_controller.Controller(sink, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield sink, controller.port
+    controller.stop()
+
+
+@pytest.fixture
+def pool(smtp_server, monkeypatch):
+    _, port = smtp_server
+    pool = SMTPConnectionPool("127.0.0.1", port, None, None, starttls=False, size=1)
+    monkeypatch.setattr(email_utils, "smtp_pool", pool)
+    monkeypatch.setattr(email_utils, "SMTP_USER", "noreply@example.com")
+    yield pool
+    pool.close_all()
+
+
+def test_outbox_delivers_and_clears_body(smtp_server, pool, monkeypatch):
+    sink, _ = smtp_server
+    outbox = OutboxCollection()
+    monkeypatch.setattr(email_outbox, "email_outbox", outbox)
+
+    message_id = email_outbox.enqueue_email("admin@example.com", "Admin OTP", "Your OTP is 123456")
+    assert outbox.docs[message_id]["status"] == "queued"
+
+    assert email_outbox.process_once() is True
+    assert email_outbox.process_once() is False
+
+    doc = outbox.docs[message_id]
+    assert doc["status"] == "sent"
+    assert doc["sent_at"] is not None
+    assert "message" not in doc
+    assert len(sink.messages) == 1
+    assert b"Your OTP is 123456" in sink.messages[0].original_content
+    assert sink.messages[0].rcpt_tos == ["admin@example.com"]
+
+
+def test_pool_retries_dropped_session(smtp_server, pool):
+    sink, _ = smtp_server
+    email_utils.send_email("a@example.com", "first", "one")
+
+    # The pooled session goes away between sends (server idle timeout, network drop)
+    server, _ = pool._idle.queue[0]
+    server.close()
+
+    email_utils.send_email("b@example.com", "second", "two")
+
+    stats = pool.stats()
+    assert stats["sent"] == 2
+    assert stats["failed"] == 0
+    assert stats["reconnects"] == 1
+    assert [m.rcpt_tos for m in sink.messages] == [["a@example.com"], ["b@example.com"]]
@@ -0,0 +1,43 @@
+# tests/test_startup.py
+# Worker startup budget: importing the app must stay fast and small, which means
+# pandas/openpyxl (bulk import) and Pillow (thumbnails) load only when first used.
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SECONDS_BUDGET = float(os.getenv("STARTUP_SECONDS_BUDGET", 3.0))
+STARTUP_RSS_MB_BUDGET = float(os.getenv("STARTUP_RSS_MB_BUDGET", 100))
+LAZY_MODULES = ("pandas", "openpyxl", "PIL")
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import app.main
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": [m for m in %r if m in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def import_app() -> dict:
+    # Fresh interpreter: modules already imported by pytest would hide the real cost
+    env = {**os.environ, "SMTP_PORT": os.environ.get("SMTP_PORT") or "587"}
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    assert import_app()["modules"] == []
+
+
+def test_startup_within_budget():
+    result = import_app()
+    assert result["seconds"] < STARTUP_SECONDS_BUDGET, result
+    assert result["rss_mb"] < STARTUP_RSS_MB_BUDGET, result